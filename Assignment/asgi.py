@@ -12,5 +12,11 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Assignment.settings')
+# Serve the async page views (Task1/async_urls.py)
+os.environ.setdefault('DJANGO_ASYNC_VIEWS', 'True')
 
 application = get_asgi_application()
+
+from Task1.warmup import warm_templates  # noqa: E402
+
+warm_templates()
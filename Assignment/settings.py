@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 
 from pathlib import Path
 import os
+import django
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -48,7 +50,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'Task1.metrics.MetricsMiddleware',
+    'Task1.profiler.SamplingProfilerMiddleware',
+    'Task1.querybudget.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'Task1.routers.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -59,14 +65,26 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'Assignment.urls'
 
+# Set by Assignment/asgi.py so the ASGI server routes to the async page views
+ASYNC_VIEWS = os.getenv('DJANGO_ASYNC_VIEWS', 'False') == 'True'
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates plus render timing for /metrics
+        'BACKEND': 'Task1.metrics.TimedDjangoTemplates',
+        'NAME': 'django',
         'DIRS': [
             os.path.join(BASE_DIR, 'Task1', 'templates'),
         ],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Templates are parsed once per process and then served from memory;
+            # the dev server's autoreloader clears this cache when a template changes
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -79,6 +97,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'Assignment.wsgi.application'
 
+# Compile the main templates when a worker boots instead of on its first requests
+TEMPLATE_WARMUP = os.getenv('TEMPLATE_WARMUP', 'True') == 'True'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
@@ -91,8 +112,158 @@ DATABASES = {
         "PASSWORD": os.getenv("DATABASE_PASSWORD", "1234"),
         "HOST": os.getenv("DATABASE_HOST", "127.0.0.1"),
         "PORT": os.getenv("DATABASE_PORT", "5432"),
+        # Keep connections open between requests instead of reconnecting each time,
+        # and check them before reuse so a dropped connection isn't handed out
+        "CONN_MAX_AGE": int(os.getenv("DATABASE_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": os.getenv("DATABASE_CONN_HEALTH_CHECKS", "True") == "True",
+    }
+}
+
+# DATABASE_POOL selects connection pooling:
+#   none      - persistent per-thread connections only (default)
+#   pgbouncer - connect through PgBouncer in transaction mode; server-side cursors
+#               don't survive across its transactions, so they are disabled
+#   django    - Django's in-process psycopg pool (Django 5.1+ with psycopg[pool])
+DATABASE_POOL = os.getenv("DATABASE_POOL", "none")
+if DATABASE_POOL == "pgbouncer":
+    DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = True
+elif DATABASE_POOL == "django":
+    if django.VERSION < (5, 1):
+        raise ImproperlyConfigured("DATABASE_POOL=django needs Django 5.1 or newer.")
+    # The pool manages connection lifetime itself
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.getenv("DATABASE_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.getenv("DATABASE_POOL_MAX_SIZE", "10")),
+        },
+    }
+elif DATABASE_POOL != "none":
+    raise ImproperlyConfigured(f"Unknown DATABASE_POOL {DATABASE_POOL!r}")
+
+# Under ASGI each request's sync work runs in a fresh thread, so a persistent
+# connection is never reused and never closed. Close them at the end of every
+# request instead and keep connecting cheap with DATABASE_POOL=pgbouncer.
+if ASYNC_VIEWS:
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+
+# Read replicas: DATABASE_REPLICA_HOSTS=host1:5432,host2 adds one alias per host,
+# sharing the primary's name and credentials. Dashboard and API reads go to a
+# replica unless the user wrote something in the last REPLICA_PIN_SECONDS.
+DATABASE_REPLICAS = []
+for number, replica in enumerate(filter(None, os.getenv("DATABASE_REPLICA_HOSTS", "").split(",")), start=1):
+    host, _, port = replica.strip().partition(":")
+    alias = f"replica{number}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port or DATABASES["default"]["PORT"],
+        "TEST": {"MIRROR": "default"},
     }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['Task1.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", "5"))
+
+# The async student dashboard runs its independent reads at the same time,
+# each on its own connection. DASHBOARD_QUERY_CONNECTIONS caps how many one
+# request uses at once (1 runs them in turn); DASHBOARD_QUERY_WORKERS is the
+# thread pool, one connection per thread, shared by all requests in a process.
+DASHBOARD_QUERY_CONNECTIONS = int(os.getenv("DASHBOARD_QUERY_CONNECTIONS", "3"))
+DASHBOARD_QUERY_WORKERS = int(os.getenv("DASHBOARD_QUERY_WORKERS", "10"))
+
+# Metrics (Task1.metrics), served at /metrics in the Prometheus text format.
+# With several worker processes, point METRICS_DIR at a directory they share
+# (emptied at deploy); each worker writes its samples there every
+# METRICS_FLUSH_SECONDS and /metrics adds them up. Set METRICS_TOKEN to
+# require "Authorization: Bearer <token>" from the scraper.
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Sampling profiler (Task1.profiler): with PROFILER_DIR set, requests that
+# carry a signed X-Profile header (python manage.py profiler_token) or are
+# picked at PROFILER_SAMPLE_RATE write collapsed-stack profiles there.
+PROFILER_DIR = os.getenv("PROFILER_DIR", "")
+PROFILER_SAMPLE_RATE = float(os.getenv("PROFILER_SAMPLE_RATE", "0"))
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+PROFILER_TOKEN_MAX_AGE = int(os.getenv("PROFILER_TOKEN_MAX_AGE", "3600"))
+
+# Query budgets (Task1.querybudget): each request's query count, database time
+# in ms and repeats of any one query shape (N+1s) are checked against the
+# budget for its URL name, on top of the default. Over-budget requests are
+# logged, or fail with QUERY_BUDGET_ACTION=raise. On by default with DEBUG.
+QUERY_BUDGET_ENABLED = os.getenv("QUERY_BUDGET_ENABLED", str(DEBUG)) == "True"
+QUERY_BUDGET_ACTION = os.getenv("QUERY_BUDGET_ACTION", "log")
+QUERY_BUDGET_DEFAULT = {"queries": 30, "time_ms": 500, "repeats": 3}
+QUERY_BUDGETS = {
+    "index": {"queries": 0},
+    "student-dashboard": {"queries": 10},
+    "faculty-dashboard": {"queries": 6},
+}
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# CACHE_BACKEND selects the tier: 'locmem' (per process, the default and what
+# tests use), 'file' (shared by processes on one host) or 'redis'.
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+CACHE_LOCATIONS = {
+    'locmem': 'course-management',
+    'file': '/var/tmp/django_cache',
+    'redis': 'redis://127.0.0.1:6379/1',
+}
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.getenv('CACHE_LOCATION', CACHE_LOCATIONS[CACHE_BACKEND]),
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', '300')),
+    }
+}
+if CACHE_BACKEND in ('locmem', 'file'):
+    # Room for a rendered card per course, plus catalog pages
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '20000'))}
+
+# How long shared course catalog pages stay cached (seconds)
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', '60'))
+
+# Password hashing
+# https://docs.djangoproject.com/en/5.0/topics/auth/passwords/
+# PASSWORD_HASHER_PROFILE picks the hasher for new passwords: 'pbkdf2' (Django's
+# default), 'scrypt' or 'argon2' (needs argon2-cffi). The others stay installed
+# so existing hashes still verify.
+
+PASSWORD_HASHER_PROFILES = {
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'Task1.hashers.TunedScryptPasswordHasher',
+    'argon2': 'Task1.hashers.TunedArgon2PasswordHasher',
 }
+PASSWORD_HASHER_PROFILE = os.getenv('PASSWORD_HASHER_PROFILE', 'pbkdf2')
+PASSWORD_HASHERS = [PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE]] + [
+    hasher for profile, hasher in PASSWORD_HASHER_PROFILES.items() if profile != PASSWORD_HASHER_PROFILE
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.getenv('PASSWORD_SCRYPT_WORK_FACTOR', str(2 ** 14)))
+PASSWORD_ARGON2_TIME_COST = int(os.getenv('PASSWORD_ARGON2_TIME_COST', '2'))
+PASSWORD_ARGON2_MEMORY_COST = int(os.getenv('PASSWORD_ARGON2_MEMORY_COST', '102400'))
+PASSWORD_ARGON2_PARALLELISM = int(os.getenv('PASSWORD_ARGON2_PARALLELISM', '8'))
+
+# Processes used by the async login/registration views to hash passwords off
+# the event loop; the bound keeps login storms from taking every core
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', str(max(1, (os.cpu_count() or 2) // 2))))
+
+# Background threads that upgrade outdated password hashes after a successful
+# login, so the login itself only pays for verifying; 0 rehashes inline
+PASSWORD_REHASH_WORKERS = int(os.getenv('PASSWORD_REHASH_WORKERS', '1'))
+# Most rehashes queued or running at once; each holds a plaintext password,
+# and users past the limit are simply rehashed on a later login
+PASSWORD_REHASH_QUEUE_SIZE = int(os.getenv('PASSWORD_REHASH_QUEUE_SIZE', '1000'))
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -140,7 +311,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'Task1.authentication.PinnedTokenAuthentication',
     ]
 }
 
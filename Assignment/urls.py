@@ -4,10 +4,12 @@ URL configuration for Assignment project.
 The `urlpatterns` list routes URLs to views. For more information please see:
     https://docs.djangoproject.com/en/5.0/topics/http/urls/
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('', include('Task1.urls')),  # Include all Task1 URLs at root
+    # Include all Task1 URLs at root; ASGI deployments get the async page views
+    path('', include('Task1.async_urls' if settings.ASYNC_VIEWS else 'Task1.urls')),
 ]
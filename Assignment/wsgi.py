@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Assignment.settings')
 
 application = get_wsgi_application()
+
+from Task1.warmup import warm_templates  # noqa: E402
+
+warm_templates()
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class Task1Config(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Task1'
+
+    def ready(self):
+        from . import signals  # noqa: F401
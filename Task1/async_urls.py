@@ -0,0 +1,17 @@
+from django.urls import path
+from . import urls
+from .async_views import (
+    AsyncLoginView, AsyncRegisterView, AsyncStudentDashboardView,
+    AsyncFacultyDashboardView, AsyncIndexView
+)
+
+# The Task1 routes with the async page views in front, used under ASGI.
+# The API and logout routes are shared with urls.py.
+urlpatterns = [
+    path('', AsyncIndexView.as_view(), name='index'),
+    path('login/', AsyncLoginView.as_view(), name='login'),
+    path('register/', AsyncRegisterView.as_view(), name='register'),
+    path('student-dashboard/', AsyncStudentDashboardView.as_view(), name='student-dashboard'),
+    path('faculty-dashboard/', AsyncFacultyDashboardView.as_view(), name='faculty-dashboard'),
+    *urls.urlpatterns,
+]
@@ -0,0 +1,192 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.auth import get_user, login
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.shortcuts import redirect, render
+from django.template.loader import render_to_string
+from django.utils.cache import patch_response_headers
+from django.views import View
+
+from .caching import acached_catalog, cached_catalog
+from .hashers import amake_password, averify_password, schedule_rehash
+from .loaders import gather_queries
+from .models import User, Student
+from .services import MAX_COURSES_PER_STUDENT, register_user
+from .views import FacultyDashboardView, StudentDashboardView
+
+# Async counterparts of the page views, served under ASGI (see async_urls.py).
+# Reads use the async ORM, or Task1.loaders to overlap the student dashboard's
+# independent queries, so a request waiting on the database doesn't hold a
+# worker thread. Password hashes run in the bounded process pool from
+# Task1.hashers, so a burst of logins queues for a hashing slot instead of
+# blocking the event loop and every other request on this worker with it.
+# Template rendering and the transactional enrollment writes still run
+# through sync_to_async.
+
+INDEX_CACHE_KEY = 'page:index'
+INDEX_CACHE_SECONDS = 60 * 15
+
+arender = sync_to_async(render)
+aget_user = sync_to_async(get_user)
+alogin = sync_to_async(login)
+aregister_user = sync_to_async(register_user)
+aschedule_rehash = sync_to_async(schedule_rehash)
+
+
+async def alist(queryset):
+    return [obj async for obj in queryset]
+
+
+def dashboard_redirect(user):
+    if user.role == 'Faculty':
+        return redirect('faculty-dashboard')
+    return redirect('student-dashboard')
+
+
+class AsyncLoginView(View):
+    async def get(self, request):
+        # Check if this is a back action
+        if request.GET.get('action') == 'back':
+            return redirect('index')
+
+        user = await aget_user(request)
+        if user.is_authenticated:
+            return dashboard_redirect(user)
+        return await arender(request, 'login.html')
+
+    async def post(self, request):
+        username = request.POST.get('username')
+        password = request.POST.get('password')
+
+        if not all([username, password]):
+            messages.error(request, 'Please fill in all fields')
+            return await arender(request, 'login.html', {'error_message': 'Please fill in all fields'})
+
+        user = await User.objects.filter(username=username).afirst()
+        if user is None:
+            # Hash anyway so a missing username takes as long as a wrong password
+            await amake_password(password)
+            return await arender(request, 'login.html', {'error_message': 'Invalid credentials'})
+
+        is_correct, must_update = await averify_password(password, user.password)
+        if not is_correct or not user.is_active:
+            return await arender(request, 'login.html', {'error_message': 'Invalid credentials'})
+
+        if must_update:
+            # The hash is from an older hasher or work factor; upgrade it in the
+            # background rather than hashing a second time in this request
+            encoded = await aschedule_rehash(user.pk, password, user.password)
+            if encoded:
+                # Rehashed inline (PASSWORD_REHASH_WORKERS = 0)
+                user.password = encoded
+
+        # Auto-detect faculty users by username and fix their role if needed
+        if username.startswith('faculty') and user.role != 'Faculty':
+            user.role = 'Faculty'
+            await user.asave(update_fields=['role'])
+
+        await alogin(request, user, backend='django.contrib.auth.backends.ModelBackend')
+        return dashboard_redirect(user)
+
+
+class AsyncRegisterView(View):
+    async def get(self, request):
+        # Check if this is a back action
+        if request.GET.get('action') == 'back':
+            return redirect('index')
+
+        return await arender(request, 'register.html')
+
+    async def post(self, request):
+        username = request.POST.get('username')
+        email = request.POST.get('email')
+        password = request.POST.get('password')
+        role = request.POST.get('role')
+
+        if not all([username, email, password, role]):
+            return await arender(request, 'register.html', {'error_message': 'Please fill in all required fields'})
+
+        try:
+            encoded_password = await amake_password(password)
+            error_message = await aregister_user(username, email, role, encoded_password)
+        except Exception as e:
+            return await arender(request, 'register.html', {'error_message': str(e)})
+        if error_message:
+            return await arender(request, 'register.html', {'error_message': error_message})
+
+        messages.success(request, 'Registration successful! Please login with your credentials.')
+        return redirect('login')
+
+
+class AsyncLoginRequiredMixin:
+    """Load the session user off the event loop before LoginRequiredMixin checks it."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await aget_user(request)
+        response = super().dispatch(request, *args, **kwargs)
+        # Anonymous users get the login redirect directly, everyone else the handler's coroutine
+        if asyncio.iscoroutine(response):
+            response = await response
+        return response
+
+
+class AsyncStudentDashboardView(AsyncLoginRequiredMixin, StudentDashboardView):
+    async def get(self, request):
+        # Check ONLY the role for Student access
+        if request.user.role != 'Student':
+            messages.error(request, 'Access denied. Student account required.')
+            return redirect('login')
+
+        # Create student profile if it doesn't exist
+        student, _ = await Student.objects.aget_or_create(user=request.user)
+        # The catalog page doesn't depend on the student's courses as long as
+        # they are within the cap, so all three reads are issued together
+        catalog, filters, cache_params = self.catalog_page(request.GET, MAX_COURSES_PER_STUDENT)
+        enrolled_courses, waitlist, catalog_page = await gather_queries(
+            lambda: list(self.enrolled_courses(student)),
+            lambda: list(self.waitlist(student)),
+            lambda: cached_catalog('available', cache_params, lambda: list(catalog)),
+        )
+        if len(enrolled_courses) > MAX_COURSES_PER_STUDENT:
+            # Over the cap (e.g. enrolled by an admin); over-fetch enough for a full page
+            catalog, filters, cache_params = self.catalog_page(request.GET, len(enrolled_courses))
+            catalog_page = await acached_catalog('available', cache_params, lambda: alist(catalog))
+        return await arender(request, 'student-dashboard.html', self.get_dashboard_context(
+            request, enrolled_courses, waitlist, catalog_page, filters
+        ))
+
+    async def post(self, request):
+        # Enrollment changes run in transactions, which the async ORM doesn't support
+        return await sync_to_async(super().post)(request)
+
+
+class AsyncFacultyDashboardView(AsyncLoginRequiredMixin, FacultyDashboardView):
+    async def get(self, request):
+        # Check ONLY the role for Faculty access
+        if request.user.role != 'Faculty':
+            messages.error(request, 'Access denied. Faculty account required.')
+            return redirect('login')
+
+        courses = await acached_catalog(
+            'faculty', {'instructor': request.user.id}, lambda: alist(self.courses(request.user))
+        )
+        return await arender(request, 'faculty-dashboard.html', {'courses': courses})
+
+    async def post(self, request):
+        return await sync_to_async(super().post)(request)
+
+
+class AsyncIndexView(View):
+    # cache_page can't wrap async views before Django 5.0, so the page body is
+    # cached here; it is the same for every visitor
+    async def get(self, request):
+        content = await cache.aget(INDEX_CACHE_KEY)
+        if content is None:
+            content = render_to_string('index.html')
+            await cache.aset(INDEX_CACHE_KEY, content, INDEX_CACHE_SECONDS)
+        response = HttpResponse(content)
+        patch_response_headers(response, INDEX_CACHE_SECONDS)
+        return response
@@ -0,0 +1,20 @@
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+
+from .routers import replica_reads_allowed, user_pinned
+
+
+class PinnedTokenAuthentication(TokenAuthentication):
+    """Token authentication that keeps users who just wrote reading from the primary.
+
+    API clients never get the ``db_pin`` cookie, so ReplicaRoutingMiddleware
+    pins them by user id after a write and this turns replica reads off for
+    the rest of their requests until the pin expires.
+    """
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None and settings.DATABASE_REPLICAS and user_pinned(result[0].pk):
+            # ReplicaRoutingMiddleware restores the previous value after the request
+            replica_reads_allowed.set(False)
+        return result
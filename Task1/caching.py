@@ -0,0 +1,80 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .metrics import inc
+from .routers import replica_reads_allowed
+
+CATALOG_VERSION_KEY = 'catalog:version'
+
+
+def catalog_version():
+    # Seeded from the clock so a version lost to eviction never repeats an old one
+    return cache.get_or_set(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+async def acatalog_version():
+    return await cache.aget_or_set(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def bump_catalog_version():
+    """Invalidate every cached catalog entry at once by moving to a new version."""
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.set(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def invalidate_catalog():
+    """Bump the catalog version for a write, now and again once it commits.
+
+    The second bump covers readers that cached pre-commit rows under the
+    version from the first one.
+    """
+    bump_catalog_version()
+    transaction.on_commit(bump_catalog_version)
+
+
+def catalog_key(version, name, params):
+    digest = hashlib.md5(repr(sorted(params.items())).encode()).hexdigest()
+    return f'catalog:{version}:{name}:{digest}'
+
+
+def cached_catalog(name, params, build):
+    """Return the cached catalog entry for ``name`` and ``params``, calling ``build`` on a miss.
+
+    Entries are keyed on the current catalog version, so any course or
+    enrollment change makes all of them unreachable and they age out. Misses
+    are built from the primary: an entry filled from a lagging replica after
+    a write's version bump would serve pre-write rows to everyone, including
+    the writer.
+    """
+    key = catalog_key(catalog_version(), name, params)
+    value = cache.get(key)
+    inc('cache_requests_total', (('cache', name), ('result', 'miss' if value is None else 'hit')))
+    if value is None:
+        token = replica_reads_allowed.set(False)
+        try:
+            value = build()
+        finally:
+            replica_reads_allowed.reset(token)
+        cache.set(key, value, settings.CATALOG_CACHE_TIMEOUT)
+    return value
+
+
+async def acached_catalog(name, params, build):
+    """Async ``cached_catalog`` for the async views; ``build`` returns an awaitable."""
+    key = catalog_key(await acatalog_version(), name, params)
+    value = await cache.aget(key)
+    inc('cache_requests_total', (('cache', name), ('result', 'miss' if value is None else 'hit')))
+    if value is None:
+        token = replica_reads_allowed.set(False)
+        try:
+            value = await build()
+        finally:
+            replica_reads_allowed.reset(token)
+        await cache.aset(key, value, settings.CATALOG_CACHE_TIMEOUT)
+    return value
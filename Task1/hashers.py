@@ -0,0 +1,119 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher, ScryptPasswordHasher, check_password, make_password
+)
+from django.db import connection, transaction
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    work_factor = settings.PASSWORD_SCRYPT_WORK_FACTOR
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    time_cost = settings.PASSWORD_ARGON2_TIME_COST
+    memory_cost = settings.PASSWORD_ARGON2_MEMORY_COST
+    parallelism = settings.PASSWORD_ARGON2_PARALLELISM
+
+
+hash_pool = None
+rehash_executor = None
+# Users with a rehash queued or running, so repeated logins don't pile up
+# work; also bounds the queue at PASSWORD_REHASH_QUEUE_SIZE
+pending_rehashes = set()
+pending_lock = threading.Lock()
+
+
+def get_hash_pool():
+    """Return the process pool shared by this worker for password hashing.
+
+    Hashing processes are started by a forkserver rather than forked from
+    the worker, which by then runs asgiref, rehash, query and profiler
+    threads whose locks a fork would copy mid-use; each one sets Django up
+    afresh.
+    """
+    global hash_pool
+    if hash_pool is None:
+        hash_pool = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context('forkserver'),
+            initializer=django.setup,
+        )
+    return hash_pool
+
+
+def verify_password(password, encoded):
+    """Return ``(is_correct, must_update)`` for ``password`` against ``encoded``."""
+    needs_update = []
+    is_correct = check_password(password, encoded, setter=needs_update.append)
+    return is_correct, bool(needs_update)
+
+
+async def averify_password(password, encoded):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_hash_pool(), verify_password, password, encoded)
+
+
+async def amake_password(password):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_hash_pool(), make_password, password)
+
+
+def get_rehash_executor():
+    global rehash_executor
+    if rehash_executor is None:
+        rehash_executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_REHASH_WORKERS, thread_name_prefix='password-rehash'
+        )
+    return rehash_executor
+
+
+def schedule_rehash(user_id, password, encoded):
+    """Upgrade ``encoded`` to the preferred hasher in the background.
+
+    The rehash is queued once the current transaction commits, so the login
+    that noticed the outdated hash only pays for verifying it. With
+    ``PASSWORD_REHASH_WORKERS = 0`` it happens inline, as Django does, and
+    the new hash is returned for the caller's copy of the user. When
+    ``PASSWORD_REHASH_QUEUE_SIZE`` rehashes are already waiting, the new one
+    is dropped; the hash stays valid and is upgraded on a later login.
+    """
+    if not settings.PASSWORD_REHASH_WORKERS:
+        return rehash_password(user_id, password, encoded)
+
+    def enqueue():
+        with pending_lock:
+            if user_id in pending_rehashes or len(pending_rehashes) >= settings.PASSWORD_REHASH_QUEUE_SIZE:
+                return
+            pending_rehashes.add(user_id)
+        get_rehash_executor().submit(run_rehash, user_id, password, encoded)
+
+    transaction.on_commit(enqueue)
+
+
+def run_rehash(user_id, password, encoded):
+    try:
+        rehash_password(user_id, password, encoded)
+    finally:
+        with pending_lock:
+            pending_rehashes.discard(user_id)
+        # Each worker thread holds its own connection; don't leave it open
+        connection.close()
+
+
+def rehash_password(user_id, password, encoded):
+    """Replace ``encoded`` with a fresh hash unless the password changed meanwhile.
+
+    Returns the new hash, or ``None`` if the password had changed. The
+    session token is left alone, so the user's sessions stay valid.
+    """
+    new_encoded = make_password(password)
+    if get_user_model().objects.filter(pk=user_id, password=encoded).update(password=new_encoded):
+        return new_encoded
+    return None
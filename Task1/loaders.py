@@ -0,0 +1,50 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+query_pool = None
+
+
+def get_query_pool():
+    """Return the threads, each holding its own connection, that run fanned-out reads."""
+    global query_pool
+    if query_pool is None:
+        query_pool = ThreadPoolExecutor(
+            max_workers=settings.DASHBOARD_QUERY_WORKERS, thread_name_prefix='dashboard-query'
+        )
+    return query_pool
+
+
+def run_query(func):
+    # Pool threads outlive requests, so apply CONN_MAX_AGE and health checks here
+    close_old_connections()
+    return func()
+
+
+async def gather_queries(*funcs):
+    """Run independent read functions at once and return their results in order.
+
+    Each function runs on a pool thread with that thread's own connection, so
+    their queries overlap instead of queuing on the single thread the async
+    ORM uses. At most ``DASHBOARD_QUERY_CONNECTIONS`` run at a time for one
+    call. Inside a transaction the functions run in turn on its connection
+    instead, since other connections can't see its uncommitted writes.
+    """
+    if await sync_to_async(lambda: connection.in_atomic_block)():
+        return [await sync_to_async(func)() for func in funcs]
+
+    loop = asyncio.get_running_loop()
+    budget = asyncio.Semaphore(settings.DASHBOARD_QUERY_CONNECTIONS)
+
+    async def run(func):
+        async with budget:
+            # Carry context variables (e.g. replica routing) into the pool thread
+            call = functools.partial(contextvars.copy_context().run, run_query, func)
+            return await loop.run_in_executor(get_query_pool(), call)
+
+    return await asyncio.gather(*(run(func) for func in funcs))
@@ -0,0 +1,100 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client, override_settings
+from Task1.models import User, Course, Student
+
+PREFIX = 'bench-asgi'
+
+
+class Command(BaseCommand):
+    help = ('Compares dashboard throughput of the sync views behind a WSGI thread pool '
+            'with the async views on one ASGI event loop, for many concurrent clients')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=500,
+                            help='Concurrent clients, each logged in as its own student')
+        parser.add_argument('--requests', type=int, default=4,
+                            help='Dashboard requests per client')
+        parser.add_argument('--wsgi-threads', type=int, default=16,
+                            help='Worker threads serving the WSGI run, e.g. gunicorn workers x threads')
+        parser.add_argument('--courses', type=int, default=200)
+
+    def handle(self, *args, **options):
+        users = self.seed(options['clients'], options['courses'])
+        # Requests run through the in-process handlers with the test client's
+        # host; the network and server front-end are left out of both runs
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver'], ROOT_URLCONF='Task1.urls'):
+                self.report('WSGI, sync views', self.run_wsgi(users, options))
+            with override_settings(ALLOWED_HOSTS=['testserver'], ROOT_URLCONF='Task1.async_urls'):
+                self.report('ASGI, async views', asyncio.run(self.run_asgi(users, options)))
+        finally:
+            self.cleanup()
+
+    def run_wsgi(self, users, options):
+        clients = [self.login(Client(), user) for user in users]
+        latencies = []
+
+        with ThreadPoolExecutor(max_workers=options['wsgi_threads']) as server:
+            def client_session(client):
+                # Each client waits for its response before sending the next request
+                for _ in range(options['requests']):
+                    sent = time.perf_counter()
+                    server.submit(client.get, '/student-dashboard/').result()
+                    latencies.append(time.perf_counter() - sent)
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=len(clients)) as client_threads:
+                list(client_threads.map(client_session, clients))
+            return time.perf_counter() - started, latencies
+
+    async def run_asgi(self, users, options):
+        clients = [await asyncio.to_thread(self.login, AsyncClient(), user) for user in users]
+        latencies = []
+
+        async def client_session(client):
+            for _ in range(options['requests']):
+                sent = time.perf_counter()
+                await client.get('/student-dashboard/')
+                latencies.append(time.perf_counter() - sent)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client_session(client) for client in clients))
+        return time.perf_counter() - started, latencies
+
+    def report(self, label, result):
+        elapsed, latencies = result
+        latencies.sort()
+        self.stdout.write(
+            f'{label}: {len(latencies) / elapsed:.0f} req/s, '
+            f'p50 {statistics.median(latencies) * 1000:.0f}ms, '
+            f'p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.0f}ms'
+        )
+
+    def login(self, client, user):
+        client.force_login(user)
+        return client
+
+    def seed(self, client_count, course_count):
+        self.cleanup()
+        instructor = User.objects.create(
+            username=f'{PREFIX}-faculty', email=f'{PREFIX}-faculty@example.com', role='Faculty'
+        )
+        Course.objects.bulk_create([
+            Course(course_name=f'Bench {i}', course_code=f'BA{i:05d}', instructor=instructor)
+            for i in range(course_count)
+        ])
+        users = User.objects.bulk_create([
+            User(username=f'{PREFIX}-{i}', email=f'{PREFIX}-{i}@example.com', role='Student')
+            for i in range(client_count)
+        ])
+        Student.objects.bulk_create([Student(user=user) for user in users])
+        return users
+
+    def cleanup(self):
+        # Courses and student profiles cascade from their users
+        User.objects.filter(username__startswith=PREFIX).delete()
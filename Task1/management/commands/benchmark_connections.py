@@ -0,0 +1,45 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connection
+from Task1.models import Course
+
+
+class Command(BaseCommand):
+    help = 'Compares per-request latency with a new database connection per request and with persistent connections'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--max-age', type=int, default=600,
+                            help='CONN_MAX_AGE to use for the persistent run')
+
+    def handle(self, *args, **options):
+        configured = connection.settings_dict['CONN_MAX_AGE']
+        try:
+            for label, max_age in (('new connection per request', 0), ('persistent connections', options['max_age'])):
+                connection.close()
+                connection.settings_dict['CONN_MAX_AGE'] = max_age
+                timings = self.run(options['requests'])
+                self.stdout.write(
+                    f'{label}: p50 {self.percentile(timings, 50):.2f}ms, '
+                    f'p99 {self.percentile(timings, 99):.2f}ms'
+                )
+        finally:
+            connection.close()
+            connection.settings_dict['CONN_MAX_AGE'] = configured
+
+    def run(self, count):
+        timings = []
+        for _ in range(count):
+            started = time.perf_counter()
+            # The request signals drive close_old_connections exactly as a real request does
+            request_started.send(sender=self.__class__)
+            Course.objects.exists()
+            request_finished.send(sender=self.__class__)
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    def percentile(self, timings, pct):
+        return statistics.quantiles(timings, n=100)[pct - 1]
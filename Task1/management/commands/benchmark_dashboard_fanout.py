@@ -0,0 +1,105 @@
+import asyncio
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, override_settings
+from Task1.models import User, Course, Student
+
+PREFIX = 'bench-fanout'
+
+
+class Command(BaseCommand):
+    help = ('Compares async student dashboard latency with its reads run one after another '
+            'and fanned out over separate connections, with simulated network delay per query')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--delay', type=float, default=2.0,
+                            help='Milliseconds added to every query, standing in for the network round trip')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--clients', type=int, default=10, help='Concurrent clients')
+        parser.add_argument('--connections', type=int, default=3,
+                            help='Per-request connection budget for the fanned-out run')
+        parser.add_argument('--courses', type=int, default=200)
+        parser.add_argument('--catalog-cache', action='store_true',
+                            help='Serve catalog pages from the cache instead of querying every time')
+
+    def handle(self, *args, **options):
+        users = self.seed(options['clients'], options['courses'])
+        delay = options['delay'] / 1000
+
+        def delayed(execute, sql, params, many, context):
+            time.sleep(delay)
+            return execute(sql, params, many, context)
+
+        def add_delay(sender, connection, **kwargs):
+            # Reconnects reuse the wrapper object, which may already carry the delay
+            if delayed not in connection.execute_wrappers:
+                connection.execute_wrappers.append(delayed)
+
+        # Every connection opened from here on, in any thread, pays the delay
+        connections.close_all()
+        connection_created.connect(add_delay)
+        overrides = {'ALLOWED_HOSTS': ['testserver'], 'ROOT_URLCONF': 'Task1.async_urls'}
+        if not options['catalog_cache']:
+            overrides['CACHES'] = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        try:
+            with override_settings(**overrides):
+                for label, budget in (('sequential', 1), ('fanned out', options['connections'])):
+                    with override_settings(DASHBOARD_QUERY_CONNECTIONS=budget):
+                        latencies = asyncio.run(self.run(users, options['requests']))
+                    latencies.sort()
+                    self.stdout.write(
+                        f'{label} ({budget} connection{"s" if budget > 1 else ""} per request): '
+                        f'p50 {statistics.median(latencies) * 1000:.1f}ms, '
+                        f'p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f}ms'
+                    )
+        finally:
+            connection_created.disconnect(add_delay)
+            connections.close_all()
+            self.cleanup()
+
+    async def run(self, users, request_count):
+        clients = []
+        for user in users:
+            client = AsyncClient()
+            await asyncio.to_thread(client.force_login, user)
+            clients.append(client)
+        latencies = []
+        remaining = iter(range(request_count))
+
+        async def client_session(client):
+            for _ in remaining:
+                sent = time.perf_counter()
+                await client.get('/student-dashboard/')
+                latencies.append(time.perf_counter() - sent)
+
+        await asyncio.gather(*(client_session(client) for client in clients))
+        return latencies
+
+    def seed(self, client_count, course_count):
+        self.cleanup()
+        instructor = User.objects.create(
+            username=f'{PREFIX}-faculty', email=f'{PREFIX}-faculty@example.com', role='Faculty'
+        )
+        courses = Course.objects.bulk_create([
+            Course(course_name=f'Bench {i}', course_code=f'BF{i:05d}', instructor=instructor)
+            for i in range(course_count)
+        ])
+        users = User.objects.bulk_create([
+            User(username=f'{PREFIX}-{i}', email=f'{PREFIX}-{i}@example.com', role='Student')
+            for i in range(client_count)
+        ])
+        students = Student.objects.bulk_create([Student(user=user) for user in users])
+        # Two enrollments each, so the enrolled-course query returns rows
+        Student.courses.through.objects.bulk_create([
+            Student.courses.through(student_id=student.id, course_id=course.id)
+            for student in students for course in courses[:2]
+        ])
+        return users
+
+    def cleanup(self):
+        # Courses and student profiles cascade from their users
+        User.objects.filter(username__startswith=PREFIX).delete()
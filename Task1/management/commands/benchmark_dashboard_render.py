@@ -0,0 +1,66 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.test import RequestFactory, override_settings
+from django.utils import timezone
+from Task1.models import User, Course
+
+
+class Command(BaseCommand):
+    help = 'Measures dashboard template render time with cold and warm course card fragment caches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses', type=int, nargs='+', default=[1000, 10000])
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        # A private cache, so clearing it between runs never touches the
+        # configured (possibly shared) one; room for every card it renders
+        private_cache = {'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'benchmark-dashboard-render',
+            'OPTIONS': {'MAX_ENTRIES': max(options['courses']) * 2},
+        }}
+        with override_settings(CACHES=private_cache):
+            self.run(options)
+
+    def run(self, options):
+        # Cards are rendered from unsaved courses, so no database is needed
+        instructor = User(id=1, username='faculty1', role='Faculty')
+        request = RequestFactory().get('/')
+        request.user = instructor
+
+        for count in options['courses']:
+            now = timezone.now()
+            courses = [
+                Course(id=i, course_name=f'Course {i}', course_code=f'C{i:05d}', credits=3,
+                       capacity=50, seats_taken=i % 50, updated_at=now, instructor=instructor)
+                for i in range(1, count + 1)
+            ]
+            for course in courses:
+                course.enrolled_count = course.seats_taken
+                course.seats_remaining = course.capacity - course.seats_taken
+
+            for template, context in (
+                ('student-dashboard.html', {'enrolled_courses': [], 'available_courses': courses,
+                                            'waitlisted_ids': set(), 'can_enroll': True}),
+                ('faculty-dashboard.html', {'courses': courses}),
+            ):
+                cache.clear()
+                cold = self.time_render(template, context, request, 1)
+                warm = self.time_render(template, context, request, options['repeat'])
+                self.stdout.write(
+                    f'{template} with {count} courses: cold {cold * 1000:.1f}ms, '
+                    f'warm {warm * 1000:.1f}ms ({(1 - warm / cold) * 100:.0f}% less)'
+                )
+
+    def time_render(self, template, context, request, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            render_to_string(template, context, request)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
@@ -0,0 +1,85 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Count
+from Task1.models import User, Course, Student
+from Task1.services import ENROLLED, MAX_COURSES_PER_STUDENT, enroll_student
+
+PREFIX = 'bench-enroll'
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks concurrent enrollment against the configured database and checks the course cap and seat limits hold'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=200)
+        parser.add_argument('--courses', type=int, default=5)
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--capacity', type=int, default=None,
+                            help='Seat limit for each course; use few courses and many students to load a hot course')
+
+    def handle(self, *args, **options):
+        if not connection.features.has_select_for_update:
+            raise CommandError('This benchmark needs a database with row locking, such as PostgreSQL.')
+
+        students, courses = self.seed(options['students'], options['courses'], options['capacity'])
+        # Every student tries every course at once, so each one races itself
+        attempts = [(student, course.id) for student in students for course in courses]
+
+        def attempt(args):
+            try:
+                return enroll_student(*args).status
+            finally:
+                connections.close_all()
+
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+                statuses = list(pool.map(attempt, attempts))
+            elapsed = time.perf_counter() - started
+
+            over_cap = sum(
+                1 for student in Student.objects.filter(id__in=[s.id for s in students])
+                if student.courses.count() > MAX_COURSES_PER_STUDENT
+            )
+            self.stdout.write(
+                f'{len(attempts)} attempts in {elapsed:.2f}s '
+                f'({len(attempts) / elapsed:.0f}/s), {statuses.count(ENROLLED)} enrolled'
+            )
+            if over_cap:
+                raise CommandError(f'{over_cap} students exceeded the {MAX_COURSES_PER_STUDENT}-course cap')
+
+            for course in Course.objects.filter(id__in=[c.id for c in courses]).annotate(enrolled=Count('students')):
+                if course.enrolled != course.seats_taken:
+                    raise CommandError(
+                        f'{course.course_code}: seats_taken={course.seats_taken} but {course.enrolled} enrolled'
+                    )
+                if course.capacity is not None and course.enrolled > course.capacity:
+                    raise CommandError(
+                        f'{course.course_code}: {course.enrolled} enrolled exceeds capacity {course.capacity}'
+                    )
+            self.stdout.write(self.style.SUCCESS('No student exceeded the course cap and no course was oversubscribed'))
+        finally:
+            self.cleanup()
+
+    def seed(self, student_count, course_count, capacity):
+        self.cleanup()
+        instructor = User.objects.create(
+            username=f'{PREFIX}-faculty', email=f'{PREFIX}-faculty@example.com', role='Faculty'
+        )
+        courses = Course.objects.bulk_create([
+            Course(course_name=f'Bench {i}', course_code=f'BE{i:05d}', capacity=capacity, instructor=instructor)
+            for i in range(course_count)
+        ])
+        users = User.objects.bulk_create([
+            User(username=f'{PREFIX}-{i}', email=f'{PREFIX}-{i}@example.com')
+            for i in range(student_count)
+        ])
+        students = Student.objects.bulk_create([Student(user=user) for user in users])
+        return students, courses
+
+    def cleanup(self):
+        # Courses and student profiles cascade from their users
+        User.objects.filter(username__startswith=PREFIX).delete()
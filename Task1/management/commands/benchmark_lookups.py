@@ -0,0 +1,76 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from Task1.models import User, Course
+
+PREFIX = 'bench-lookup'
+
+
+class Command(BaseCommand):
+    help = (
+        'Seeds a large dataset and reports query plans and latency for the hot course and user lookups. '
+        'Run it before and after migrating Task1 to 0010_student_id_index to compare.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Number of courses and users to seed')
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded rows for another run')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Query plans are only reported for PostgreSQL.')
+
+        if not User.objects.filter(username__startswith=PREFIX).exists():
+            self.seed(options['rows'], options['batch_size'])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        instructor = User.objects.filter(username=f'{PREFIX}-faculty-7').first()
+        middle = f'BL{options["rows"] // 2:07d}'.lower()
+        middle_user_id = User.objects.filter(
+            username=f'{PREFIX}-{options["rows"] // 2}'
+        ).values_list('id', flat=True).first()
+        lookups = {
+            'course_code__iexact': Course.objects.filter(course_code__iexact=middle),
+            'courses by instructor': Course.objects.filter(instructor=instructor).order_by('course_code'),
+            # One batch of create_student_profile's walk over Student users by id
+            'Student users by id': User.objects.filter(
+                role='Student', id__gt=middle_user_id
+            ).order_by('id').values('id')[:1000],
+        }
+        try:
+            for label, queryset in lookups.items():
+                self.stdout.write(self.style.MIGRATE_HEADING(label))
+                self.stdout.write(queryset.explain(analyze=True))
+                best = None
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    list(queryset.all())
+                    elapsed = time.perf_counter() - started
+                    best = elapsed if best is None else min(best, elapsed)
+                self.stdout.write(f'best of {options["repeat"]}: {best * 1000:.2f}ms\n')
+        finally:
+            if not options['keep']:
+                User.objects.filter(username__startswith=PREFIX).delete()
+
+    def seed(self, rows, batch_size):
+        faculty = User.objects.bulk_create([
+            User(username=f'{PREFIX}-faculty-{i}', email=f'{PREFIX}-faculty-{i}@example.com', role='Faculty')
+            for i in range(100)
+        ])
+        for start in range(0, rows, batch_size):
+            stop = min(start + batch_size, rows)
+            # Most users of a course system are students; one in 20 here teaches
+            User.objects.bulk_create([
+                User(username=f'{PREFIX}-{i}', email=f'{PREFIX}-{i}@example.com',
+                     role='Faculty' if i % 20 == 0 else 'Student')
+                for i in range(start, stop)
+            ])
+            Course.objects.bulk_create([
+                Course(course_name=f'Bench {i}', course_code=f'BL{i:07d}', instructor=faculty[i % len(faculty)])
+                for i in range(start, stop)
+            ])
+            self.stdout.write(f'Seeded {stop} rows')
@@ -0,0 +1,58 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+
+def hash_once(hasher_path):
+    hasher = import_string(hasher_path)()
+    return hasher.encode('benchmark-password', hasher.salt())
+
+
+class Command(BaseCommand):
+    help = 'Measures password hashes per second for each hasher profile, on one core and through a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hashes', type=int, default=20,
+                            help='Hashes to time per profile and mode')
+        parser.add_argument('--workers', type=int, default=settings.PASSWORD_HASH_WORKERS)
+        parser.add_argument('--profile', action='append', dest='profiles',
+                            choices=sorted(settings.PASSWORD_HASHER_PROFILES),
+                            help='Profile to measure; repeat for several (default: all)')
+
+    def handle(self, *args, **options):
+        count = options['hashes']
+        workers = options['workers']
+        if count < 1 or workers < 1:
+            raise CommandError('--hashes and --workers must be positive')
+
+        self.stdout.write(f'{count} hashes per run, {workers} pool workers, {os.cpu_count()} cores')
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+            for profile in options['profiles'] or sorted(settings.PASSWORD_HASHER_PROFILES):
+                hasher_path = settings.PASSWORD_HASHER_PROFILES[profile]
+                try:
+                    hash_once(hasher_path)
+                except ValueError as e:
+                    # e.g. argon2 without argon2-cffi installed
+                    self.stdout.write(f'{profile}: skipped ({e})')
+                    continue
+
+                started = time.perf_counter()
+                for _ in range(count):
+                    hash_once(hasher_path)
+                single = count / (time.perf_counter() - started)
+
+                # Warm the workers up so process start-up isn't timed
+                list(pool.map(hash_once, [hasher_path] * workers))
+                started = time.perf_counter()
+                list(pool.map(hash_once, [hasher_path] * count))
+                pooled = count / (time.perf_counter() - started)
+
+                self.stdout.write(
+                    f'{profile}: {single:.1f} hashes/s on one core, '
+                    f'{pooled:.1f} hashes/s across {workers} workers ({pooled / workers:.1f}/s per worker)'
+                )
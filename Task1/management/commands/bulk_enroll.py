@@ -0,0 +1,46 @@
+import csv
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from Task1.services import BULK_ENROLL_BATCH_SIZE, bulk_enroll
+
+
+class Command(BaseCommand):
+    help = 'Enrolls students from a CSV file of username,course_code rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file with username and course_code columns')
+        parser.add_argument('--batch-size', type=int, default=BULK_ENROLL_BATCH_SIZE)
+        parser.add_argument('--output', help='Write a CSV with the status of every row to this path')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            with open(path, newline='') as f:
+                reader = csv.DictReader(f)
+                pairs = []
+                for row in reader:
+                    # Short rows leave the missing columns as None
+                    username = (row.get('username') or '').strip()
+                    code = (row.get('course_code') or '').strip()
+                    if not username or not code:
+                        raise CommandError(f'{path} line {reader.line_num}: expected username and course_code')
+                    pairs.append((username, code))
+        except (OSError, csv.Error) as e:
+            raise CommandError(f'Could not read {path}: {e}')
+
+        started = time.perf_counter()
+        statuses = bulk_enroll(pairs, batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+
+        if options['output']:
+            with open(options['output'], 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['username', 'course_code', 'status'])
+                writer.writerows((username, code, status) for (username, code), status in zip(pairs, statuses))
+
+        for status, count in sorted(Counter(statuses).items()):
+            self.stdout.write(f'{status}: {count}')
+        rate = len(pairs) / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(f'Processed {len(pairs)} rows in {elapsed:.2f}s ({rate:.0f} rows/s)'))
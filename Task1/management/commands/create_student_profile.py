@@ -1,22 +1,54 @@
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from Task1.models import User, Student
 
 class Command(BaseCommand):
     help = 'Creates student profiles for users with Student role that don\'t have one'
 
-    def handle(self, *args, **kwargs):
-        users = User.objects.filter(role='Student')
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Number of profiles to insert per query')
+        parser.add_argument('--progress-every', type=int, default=50000,
+                            help='Report progress after this many profiles')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only count the users that are missing a profile')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        # Anti-join: Student-role users with no profile row
+        missing = User.objects.filter(role='Student', student_profile__isnull=True)
+
+        if options['dry_run']:
+            self.stdout.write(f'{missing.count()} student profiles would be created')
+            return
+
         created_count = 0
-        
-        for user in users:
-            try:
-                # Check if student profile exists
-                student = user.student_profile
-                self.stdout.write(f'Student profile already exists for {user.username}')
-            except Student.DoesNotExist:
-                # Create student profile if it doesn't exist
-                Student.objects.create(user=user)
-                created_count += 1
-                self.stdout.write(f'Created student profile for {user.username}')
-        
-        self.stdout.write(self.style.SUCCESS(f'Successfully created {created_count} student profiles')) 
\ No newline at end of file
+        next_report = options['progress_every']
+        last_id = 0
+        while True:
+            # Walk the missing users by id so each batch is an index range scan
+            user_ids = list(
+                missing.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not user_ids:
+                break
+            created_count += self.create_profiles(user_ids)
+            last_id = user_ids[-1]
+            if created_count >= next_report:
+                self.stdout.write(f'Created {created_count} student profiles so far')
+                next_report += options['progress_every']
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully created {created_count} student profiles'))
+
+    def create_profiles(self, user_ids):
+        """Create the missing profiles for ``user_ids``; returns how many were inserted."""
+        with transaction.atomic():
+            # Locking the users holds off concurrent profile inserts for them
+            # (their foreign key check waits on the lock), so the profiles that
+            # exist now are exactly the ones the insert below skips
+            list(User.objects.select_for_update().filter(id__in=user_ids).values_list('id'))
+            existing = Student.objects.filter(user_id__in=user_ids).count()
+            Student.objects.bulk_create(
+                [Student(user_id=user_id) for user_id in user_ids], ignore_conflicts=True
+            )
+        return len(user_ids) - existing
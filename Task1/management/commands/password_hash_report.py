@@ -0,0 +1,47 @@
+from collections import Counter
+
+from django.contrib.auth.hashers import get_hasher, identify_hasher, is_password_usable
+from django.core.management.base import BaseCommand
+from Task1.models import User
+
+
+class Command(BaseCommand):
+    help = 'Reports how many users are on each password hasher and work factor, and how many still need an upgrade'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help='Password hashes to fetch per round trip')
+
+    def handle(self, *args, **options):
+        preferred = get_hasher()
+        groups = Counter()
+        outdated = 0
+        for encoded in User.objects.values_list('password', flat=True).iterator(chunk_size=options['chunk_size']):
+            group, needs_upgrade = self.classify(encoded, preferred)
+            groups[group] += 1
+            outdated += needs_upgrade
+
+        for (group, needs_upgrade), count in sorted(groups.items()):
+            self.stdout.write(f'{group}: {count} users{" (needs upgrade)" if needs_upgrade else ""}')
+        self.stdout.write(
+            f'{outdated} of {sum(groups.values())} users will be rehashed to {preferred.algorithm} on their next login'
+        )
+
+    def classify(self, encoded, preferred):
+        if not is_password_usable(encoded):
+            return ('unusable password', False), False
+        try:
+            hasher = identify_hasher(encoded)
+        except ValueError:
+            # Not a hasher we have installed; these users can't log in
+            return ('unknown hasher', False), False
+
+        # Everything the hasher decodes except the per-user salt and digest is
+        # a parameter, e.g. iterations for PBKDF2 or the work factor for scrypt
+        params = {
+            key: value for key, value in hasher.decode(encoded).items()
+            if key not in ('algorithm', 'salt', 'hash')
+        }
+        label = ' '.join([hasher.algorithm] + [f'{key}={value}' for key, value in sorted(params.items())])
+        needs_upgrade = hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+        return (label, needs_upgrade), needs_upgrade
@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from Task1.profiler import PROFILE_HEADER, make_token
+
+
+class Command(BaseCommand):
+    help = 'Prints a signed X-Profile header value that makes a request write a sampling profile'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{PROFILE_HEADER}: {make_token()}')
+        self.stdout.write(
+            f'Valid for {settings.PROFILER_TOKEN_MAX_AGE} seconds; profiles are written to '
+            f'{settings.PROFILER_DIR or "(PROFILER_DIR is not set, profiling is off)"}'
+        )
@@ -0,0 +1,285 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger(__name__)
+
+# name -> (type, help) for everything exported at /metrics
+METRICS = {
+    'http_requests_total': ('counter', 'Requests by URL name, method and status code.'),
+    'http_request_duration_seconds': ('histogram', 'Request latency by URL name.'),
+    'db_queries_total': ('counter', 'Database queries by URL name.'),
+    'db_query_duration_seconds_total': ('counter', 'Time spent in database queries by URL name.'),
+    'template_render_duration_seconds': ('histogram', 'Template render time by template.'),
+    'cache_requests_total': ('counter', 'Catalog cache lookups by cache and result (hit or miss).'),
+    'enrollment_outcomes_total': ('counter', 'Enrollment service outcomes by operation and status.'),
+}
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+# This process's samples. Labels are tuples of (name, value) pairs; a
+# histogram holds one count per bucket, then the +Inf count and the sum.
+counters = {}
+histograms = {}
+lock = threading.Lock()
+next_flush = 0.0
+# METRICS_DIR once it has been created
+created_dir = None
+
+# [query count, seconds] for the request being timed
+request_db_time = ContextVar('request_db_time', default=None)
+
+
+def inc(name, labels=(), value=1):
+    key = (name, labels)
+    with lock:
+        counters[key] = counters.get(key, 0) + value
+
+
+def observe(name, labels, seconds):
+    with lock:
+        add_observation((name, labels), seconds)
+
+
+def add_observation(key, seconds):
+    # Callers hold the lock
+    buckets = histograms.get(key)
+    if buckets is None:
+        buckets = histograms[key] = [0] * (len(BUCKETS) + 2)
+    # Buckets are stored non-cumulatively and summed on export
+    buckets[bisect_left(BUCKETS, seconds)] += 1
+    buckets[-1] += seconds
+
+
+def count_outcomes(func):
+    """Count the statuses returned by an enrollment service function."""
+    operation = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        result = func(*args, **kwargs)
+        # bulk_enroll returns a list of statuses, the others an EnrollmentResult
+        statuses = Counter(result) if isinstance(result, list) else {result.status: 1}
+        for status, count in statuses.items():
+            inc('enrollment_outcomes_total', (('operation', operation), ('status', status)), count)
+        return result
+    return wrapper
+
+
+def time_query(execute, sql, params, many, context):
+    totals = request_db_time.get()
+    if totals is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        totals[0] += 1
+        totals[1] += time.perf_counter() - started
+
+
+def add_query_timer(sender, connection, **kwargs):
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+def snapshot():
+    with lock:
+        return (
+            [[name, labels, value] for (name, labels), value in counters.items()],
+            [[name, labels, list(buckets)] for (name, labels), buckets in histograms.items()],
+        )
+
+
+def flush():
+    """Write this process's samples to ``METRICS_DIR`` for the /metrics endpoint to merge.
+
+    Runs on the request path, so a missing or read-only directory is logged
+    rather than raised; the samples are kept for the next attempt.
+    """
+    global next_flush, created_dir
+    next_flush = time.monotonic() + settings.METRICS_FLUSH_SECONDS
+    path = os.path.join(settings.METRICS_DIR, f'metrics_{os.getpid()}.json')
+    try:
+        if created_dir != settings.METRICS_DIR:
+            os.makedirs(settings.METRICS_DIR, exist_ok=True)
+            created_dir = settings.METRICS_DIR
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump(snapshot(), f)
+        # Readers only ever see a complete file
+        os.replace(f'{path}.tmp', path)
+    except OSError:
+        logger.exception('Could not write metrics to %s', settings.METRICS_DIR)
+
+
+def maybe_flush():
+    global next_flush
+    now = time.monotonic()
+    if now >= next_flush:
+        if settings.METRICS_DIR:
+            flush()
+        else:
+            next_flush = now + settings.METRICS_FLUSH_SECONDS
+
+
+def collect():
+    """Merge the samples of every worker process, or just this one without ``METRICS_DIR``."""
+    if not settings.METRICS_DIR:
+        snapshots = [snapshot()]
+    else:
+        flush()
+        snapshots = []
+        try:
+            filenames = os.listdir(settings.METRICS_DIR)
+        except OSError:
+            # flush() has logged why; report this process alone
+            filenames = []
+            snapshots.append(snapshot())
+        for filename in filenames:
+            if filename.startswith('metrics_') and filename.endswith('.json'):
+                try:
+                    with open(os.path.join(settings.METRICS_DIR, filename)) as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    # Removed or half-written by another process; caught next scrape
+                    continue
+
+    merged_counters = {}
+    merged_histograms = {}
+    for process_counters, process_histograms in snapshots:
+        for name, labels, value in process_counters:
+            key = (name, tuple(map(tuple, labels)))
+            merged_counters[key] = merged_counters.get(key, 0) + value
+        for name, labels, buckets in process_histograms:
+            key = (name, tuple(map(tuple, labels)))
+            total = merged_histograms.setdefault(key, [0] * len(buckets))
+            for i, value in enumerate(buckets):
+                total[i] += value
+    return merged_counters, merged_histograms
+
+
+def format_labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def exposition():
+    """Render all metrics in the Prometheus text exposition format."""
+    merged_counters, merged_histograms = collect()
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == 'counter':
+            for (metric, labels), value in sorted(merged_counters.items()):
+                if metric == name:
+                    lines.append(f'{name}{format_labels(labels)} {value}')
+        else:
+            for (metric, labels), buckets in sorted(merged_histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip([*BUCKETS, '+Inf'], buckets[:-1]):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{format_labels(labels, [("le", bound)])} {cumulative}')
+                lines.append(f'{name}_sum{format_labels(labels)} {buckets[-1]}')
+                lines.append(f'{name}_count{format_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            observe(
+                'template_render_duration_seconds',
+                (('template', self.origin.template_name),),
+                time.perf_counter() - started,
+            )
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, recording how long each top-level render takes."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+class MetricsMiddleware:
+    """Record latency, status and database time for every request by URL name."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        # Connections opened from now on get the query timer; so does any this thread already has
+        connection_created.connect(add_query_timer, dispatch_uid='metrics_query_timer')
+        for connection in connections.all(initialized_only=True):
+            add_query_timer(None, connection)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        db_time = [0, 0.0]
+        token = request_db_time.set(db_time)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_db_time.reset(token)
+        self.record(request, response, time.perf_counter() - started, db_time)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        db_time = [0, 0.0]
+        token = request_db_time.set(db_time)
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_db_time.reset(token)
+        self.record(request, response, time.perf_counter() - started, db_time)
+        return response
+
+    def record(self, request, response, elapsed, db_time):
+        match = request.resolver_match
+        view = (match.url_name or 'unnamed') if match else 'unmatched'
+        # Keep label values bounded whatever clients send
+        method = request.method if request.method in METHODS else 'other'
+        labels = (('view', view),)
+        requests_key = ('http_requests_total', (*labels, ('method', method), ('status', str(response.status_code))))
+        # One lock round trip for everything this request records
+        with lock:
+            counters[requests_key] = counters.get(requests_key, 0) + 1
+            add_observation(('http_request_duration_seconds', labels), elapsed)
+            if db_time[0]:
+                for key, value in ((('db_queries_total', labels), db_time[0]),
+                                   (('db_query_duration_seconds_total', labels), db_time[1])):
+                    counters[key] = counters.get(key, 0) + value
+        maybe_flush()
@@ -0,0 +1,31 @@
+# Generated by Django 4.2 on 2026-10-18 20:42
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_seats_taken(apps, schema_editor):
+    Course = apps.get_model('Task1', 'Course')
+    for course in Course.objects.annotate(enrolled=Count('students')).filter(enrolled__gt=0):
+        Course.objects.filter(id=course.id).update(seats_taken=course.enrolled)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Task1', '0004_alter_course_description'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='capacity',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='seats_taken',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_seats_taken, migrations.RunPython.noop),
+    ]
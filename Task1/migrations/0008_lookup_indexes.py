@@ -0,0 +1,26 @@
+# Generated by Django 4.2 on 2026-10-18 20:56
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Task1', '0007_course_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['instructor', 'course_code'], name='course_instructor_code_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('role', 'Student')), fields=['role'], name='user_student_role_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='course',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Upper('course_code'), name='course_code_upper_unique'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2 on 2026-10-18 21:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Task1', '0009_user_email_unique'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_student_role_idx',
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('role', 'Student')), fields=['id'], name='user_student_id_idx'),
+        ),
+    ]
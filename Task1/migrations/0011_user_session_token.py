@@ -0,0 +1,35 @@
+# Generated by Django 4.2 on 2026-10-18 22:06
+
+import secrets
+
+import Task1.models
+from django.db import migrations, models
+
+
+def give_each_user_a_token(apps, schema_editor):
+    # AddField fills existing rows with one shared default
+    User = apps.get_model('Task1', 'User')
+    batch = []
+    for user in User.objects.only('id').iterator(chunk_size=2000):
+        user.session_token = secrets.token_hex(16)
+        batch.append(user)
+        if len(batch) == 2000:
+            User.objects.bulk_update(batch, ['session_token'])
+            batch = []
+    User.objects.bulk_update(batch, ['session_token'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Task1', '0010_student_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='session_token',
+            field=models.CharField(default=Task1.models.new_session_token, editable=False, max_length=32),
+        ),
+        migrations.RunPython(give_each_user_a_token, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,16 @@
+import secrets
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Upper
+from django.utils.crypto import salted_hmac
+
+
+def new_session_token():
+    return secrets.token_hex(16)
+
 
 class User(AbstractUser):
     # Make the email field required with a unique constraint
@@ -10,16 +21,74 @@ class User(AbstractUser):
         ('Faculty', 'Faculty'),
     ]
     role = models.CharField(max_length=100, choices=ROLE_CHOICES, default='Student')
+    # Sessions are tied to this rather than to the password hash, so upgrading
+    # a hash keeps the user signed in; set_password rotates it
+    session_token = models.CharField(max_length=32, default=new_session_token, editable=False)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Profile backfills walk the Student rows in id order
+            models.Index(fields=['id'], condition=models.Q(role='Student'), name='user_student_id_idx'),
+        ]
     
     def __str__(self):
         return self.username
 
+    def check_password(self, raw_password):
+        # Outdated hashes are upgraded by a background worker instead of inside
+        # the request (see Task1.hashers.schedule_rehash)
+        from .hashers import schedule_rehash
+
+        def setter(raw_password):
+            encoded = schedule_rehash(self.pk, raw_password, self.password)
+            if encoded:
+                # Rehashed inline (PASSWORD_REHASH_WORKERS = 0)
+                self.password = encoded
+
+        return check_password(raw_password, self.password, setter)
+
+    def set_password(self, raw_password):
+        super().set_password(raw_password)
+        self.session_token = new_session_token()
+
+    def set_unusable_password(self):
+        super().set_unusable_password()
+        self.session_token = new_session_token()
+
+    def _get_session_auth_hash(self, secret=None):
+        return salted_hmac(
+            'Task1.models.User.get_session_auth_hash', self.session_token, secret=secret, algorithm='sha256'
+        ).hexdigest()
+
+    def get_session_auth_fallback_hash(self):
+        yield from super().get_session_auth_fallback_hash()
+        # Sessions from before session_token are keyed on the password hash;
+        # accept them while it is unchanged (get_user moves them to the new hash)
+        for secret in (None, *settings.SECRET_KEY_FALLBACKS):
+            yield super()._get_session_auth_hash(secret=secret)
+
 class Course(models.Model):
     course_name = models.CharField(max_length=100)
     credits = models.IntegerField(default=3)
     course_code = models.CharField(max_length=10, unique=True)
     description = models.TextField(blank=True, null=True)
     instructor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='courses')
+    # Seat limit for the course; leave empty for unlimited seats
+    capacity = models.PositiveIntegerField(blank=True, null=True)
+    # Denormalized enrollment counter, only changed through Task1.services
+    seats_taken = models.PositiveIntegerField(default=0)
+    # Bumped on every save; part of the cache key for rendered course cards
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Faculty dashboards list an instructor's courses by code
+            models.Index(fields=['instructor', 'course_code'], name='course_instructor_code_idx'),
+        ]
+        constraints = [
+            # Course codes are unique regardless of case; also serves course_code__iexact lookups
+            models.UniqueConstraint(Upper('course_code'), name='course_code_upper_unique'),
+        ]
 
     def __str__(self):
         return self.course_name
@@ -29,4 +98,21 @@ class Student(models.Model):
     courses = models.ManyToManyField(Course, related_name='students')
 
     def __str__(self):
-        return self.user.username
\ No newline at end of file
+        return self.user.username
+
+class WaitlistEntry(models.Model):
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='waitlist_entries')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='waitlist_entries')
+    joined_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # Entries are served in id order; the composite index lets the next
+        # entry for a course be found without scanning the whole waitlist
+        ordering = ['id']
+        indexes = [models.Index(fields=['course', 'id'], name='waitlist_course_order_idx')]
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'course'], name='unique_waitlist_entry'),
+        ]
+
+    def __str__(self):
+        return f'{self.student} waiting for {self.course}'
@@ -0,0 +1,16 @@
+from rest_framework.pagination import CursorPagination
+
+
+class CourseCursorPagination(CursorPagination):
+    # Cursor pagination keeps deep pages as cheap as the first one
+    ordering = 'id'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class RosterCursorPagination(CursorPagination):
+    ordering = 'id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
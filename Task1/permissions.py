@@ -7,4 +7,14 @@ class IsFaculty(BasePermission):
 
 class IsStudent(BasePermission):
     def has_permission(self, request, view):
-        return request.user and request.user.is_authenticated and request.user.role == 'Student'
\ No newline at end of file
+        return request.user and request.user.is_authenticated and request.user.role == 'Student'
+
+
+class IsCourseInstructorOrStaff(BasePermission):
+    def has_object_permission(self, request, view, obj):
+        return can_view_roster(request.user, obj)
+
+
+def can_view_roster(user, course):
+    # Rosters carry student emails, so only the course's instructor and staff see them
+    return user.is_staff or course.instructor_id == user.id
@@ -0,0 +1,169 @@
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_META_KEY = 'HTTP_X_PROFILE'
+TOKEN_SALT = 'Task1.profiler'
+
+# Where a sample's time went, judged by the innermost frame that matches
+CATEGORIES = [
+    ('orm', ('django/db/',)),
+    ('template', ('django/template/', 'django/templatetags/')),
+    ('serialization', ('rest_framework/serializers', 'rest_framework/renderers', 'json/')),
+]
+# Innermost frames of threads that are parked, not working, when every thread is sampled
+IDLE_FILES = ('threading.py', 'queue.py', 'selectors.py', 'concurrent/futures/thread.py')
+
+short_names = {}
+
+
+def make_token():
+    """Return a signed value for the X-Profile header, valid for PROFILER_TOKEN_MAX_AGE seconds."""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign('profile')
+
+
+def valid_token(token):
+    try:
+        signing.TimestampSigner(salt=TOKEN_SALT).unsign(token, max_age=settings.PROFILER_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def short_name(filename):
+    # Trim the longest sys.path entry so frames read like module paths
+    name = short_names.get(filename)
+    if name is None:
+        prefixes = [path for path in sys.path if path and filename.startswith(path.rstrip(os.sep) + os.sep)]
+        name = filename[len(max(prefixes, key=len)) + 1:] if prefixes else filename
+        short_names[filename] = name
+    return name
+
+
+def collapse(frame):
+    """Return ``frame``'s stack as a collapsed-stack line, rooted at its category."""
+    frames = []
+    category = None
+    while frame is not None:
+        filename = short_name(frame.f_code.co_filename)
+        if category is None:
+            for name, markers in CATEGORIES:
+                if any(marker in filename for marker in markers):
+                    category = name
+                    break
+        frames.append(f'{filename}:{frame.f_code.co_name}')
+        frame = frame.f_back
+    frames.append(f'[{category or "python"}]')
+    return ';'.join(reversed(frames))
+
+
+class Sampler(threading.Thread):
+    """Sample the stack of one thread, or of every busy thread, every ``interval`` seconds."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name='profiler-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frames = sys._current_frames()
+            if self.thread_id is not None:
+                frame = frames.get(self.thread_id)
+                if frame is not None:
+                    self.stacks[collapse(frame)] += 1
+                continue
+            for thread_id, frame in frames.items():
+                if thread_id != self.ident and not frame.f_code.co_filename.endswith(IDLE_FILES):
+                    self.stacks[collapse(frame)] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class SamplingProfilerMiddleware:
+    """Write a flamegraph-ready profile of selected requests to ``PROFILER_DIR``.
+
+    A request is profiled when it carries a valid signed ``X-Profile`` header
+    (see the ``profiler_token`` command) or is picked at
+    ``PROFILER_SAMPLE_RATE``. Its stack is sampled every
+    ``PROFILER_INTERVAL_MS`` and written as collapsed stacks, one
+    ``frame;frame;... count`` line per distinct stack, rooted at
+    ``[orm]``, ``[template]``, ``[serialization]`` or ``[python]``. Under
+    ASGI a request's work is spread over the event loop and
+    ``sync_to_async`` threads, so every busy thread is sampled and
+    concurrent requests show up in the same profile. Without
+    ``PROFILER_DIR`` the middleware is not installed at all.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILER_DIR:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.should_profile(request):
+            return self.get_response(request)
+        sampler = self.start_sampler(threading.get_ident())
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop()
+        return self.save(request, response, sampler)
+
+    async def __acall__(self, request):
+        if not self.should_profile(request):
+            return await self.get_response(request)
+        sampler = self.start_sampler(None)
+        try:
+            response = await self.get_response(request)
+        finally:
+            sampler.stop()
+        return self.save(request, response, sampler)
+
+    def should_profile(self, request):
+        # META rather than request.headers, which is built on first access
+        token = request.META.get(PROFILE_META_KEY)
+        if token is not None:
+            return valid_token(token)
+        return settings.PROFILER_SAMPLE_RATE > 0 and random.random() < settings.PROFILER_SAMPLE_RATE
+
+    def start_sampler(self, thread_id):
+        sampler = Sampler(thread_id, settings.PROFILER_INTERVAL_MS / 1000)
+        sampler.start()
+        return sampler
+
+    def save(self, request, response, sampler):
+        if not sampler.stacks:
+            # Finished before the first sample
+            return response
+        match = request.resolver_match
+        view = (match.url_name or 'unnamed') if match else 'unmatched'
+        filename = f'{time.strftime("%Y%m%d-%H%M%S")}-{view}-{os.getpid()}-{uuid.uuid4().hex[:8]}.collapsed'
+        os.makedirs(settings.PROFILER_DIR, exist_ok=True)
+        with open(os.path.join(settings.PROFILER_DIR, filename), 'w') as f:
+            for stack, count in sampler.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+        if PROFILE_META_KEY in request.META:
+            response['X-Profile-File'] = filename
+        return response
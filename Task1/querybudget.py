@@ -0,0 +1,205 @@
+import logging
+import os
+import re
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Recorders for the request and test blocks being measured, innermost last;
+# they follow the request into sync_to_async threads and the dashboard query pool
+active_recorders = ContextVar('active_recorders', default=())
+
+# Instrumentation frames that sit between the query and the code that issued it
+INSTRUMENTATION_FILES = {__file__, metrics.__file__}
+
+# Placeholder lists and inlined numbers vary between otherwise identical queries
+PLACEHOLDER_LIST = re.compile(r'%s(?:\s*,\s*%s)+')
+NUMBER = re.compile(r'\b\d+\b')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+@dataclass
+class RecordedQuery:
+    sql: str
+    duration: float
+    # Template line or project source line that issued the query
+    origin: str
+
+
+def query_shape(sql):
+    return NUMBER.sub('N', PLACEHOLDER_LIST.sub('%s, ...', sql))
+
+
+def query_origin():
+    """Return where the current query came from: the innermost template node
+    being rendered, or else the innermost frame in the project's own code."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        code = frame.f_code
+        if code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            token = getattr(node, 'token', None)
+            origin = getattr(node, 'origin', None)
+            if token is not None and origin is not None:
+                return f'{origin.template_name}:{token.lineno}'
+        filename = code.co_filename
+        if (
+            filename.startswith(str(settings.BASE_DIR))
+            and 'site-packages' not in filename
+            and filename not in INSTRUMENTATION_FILES
+        ):
+            return f'{os.path.relpath(filename, settings.BASE_DIR)}:{frame.f_lineno}'
+        frame = frame.f_back
+    return 'unknown'
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.queries = []
+
+    @property
+    def total_time_ms(self):
+        return sum(query.duration for query in self.queries) * 1000
+
+    def repeated(self, limit):
+        """Return ``(count, query)`` for every query shape issued more than ``limit`` times."""
+        counts = Counter(query_shape(query.sql) for query in self.queries)
+        first = {}
+        for query in self.queries:
+            first.setdefault(query_shape(query.sql), query)
+        return [(count, first[shape]) for shape, count in counts.most_common() if count > limit]
+
+    def problems(self, queries=None, time_ms=None, repeats=None):
+        """Describe every way the recorded queries exceed the budget; ``None`` skips a limit."""
+        problems = []
+        if queries is not None and len(self.queries) > queries:
+            problems.append(f'{len(self.queries)} queries (budget {queries})')
+        if time_ms is not None and self.total_time_ms > time_ms:
+            problems.append(f'{self.total_time_ms:.0f}ms in the database (budget {time_ms}ms)')
+        if repeats is not None:
+            for count, query in self.repeated(repeats):
+                problems.append(f'possible N+1: {count} x "{query_shape(query.sql)}" from {query.origin}')
+        return problems
+
+
+def record_query(execute, sql, params, many, context):
+    recorders = active_recorders.get()
+    if not recorders:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        origin = query_origin()
+        for recorder in recorders:
+            recorder.queries.append(RecordedQuery(sql, duration, origin))
+
+
+def add_wrapper(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def install_wrapper(sender, connection, **kwargs):
+    add_wrapper(connection)
+
+
+@contextmanager
+def record_queries():
+    """Record every query run by this context, on any thread it reaches, while the block runs."""
+    # New connections anywhere get the wrapper; existing ones on this thread get it here
+    connection_created.connect(install_wrapper, dispatch_uid='query_budget')
+    for connection in connections.all(initialized_only=True):
+        add_wrapper(connection)
+
+    recorder = QueryRecorder()
+    token = active_recorders.set(active_recorders.get() + (recorder,))
+    try:
+        yield recorder
+    finally:
+        active_recorders.reset(token)
+
+
+def budget_for(url_name):
+    return {**settings.QUERY_BUDGET_DEFAULT, **settings.QUERY_BUDGETS.get(url_name, {})}
+
+
+class QueryBudgetMiddleware:
+    """Count each request's queries and database time against its URL's budget.
+
+    Budgets come from ``QUERY_BUDGETS`` by URL name, on top of
+    ``QUERY_BUDGET_DEFAULT``. Requests that go over, or repeat one query
+    shape more than ``repeats`` times (an N+1), are logged with the template
+    line or code that issued the query, or raise ``QueryBudgetExceeded``
+    when ``QUERY_BUDGET_ACTION`` is ``'raise'``. Only installed when
+    ``QUERY_BUDGET_ENABLED`` is on, since finding the origin walks the stack
+    on every query.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.QUERY_BUDGET_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with record_queries() as recorder:
+            response = self.get_response(request)
+        self.check(request, recorder)
+        return response
+
+    async def __acall__(self, request):
+        with record_queries() as recorder:
+            response = await self.get_response(request)
+        self.check(request, recorder)
+        return response
+
+    def check(self, request, recorder):
+        match = request.resolver_match
+        url_name = match.url_name if match else None
+        problems = recorder.problems(**budget_for(url_name))
+        if not problems:
+            return
+        message = f'{request.method} {request.path} ({url_name}): ' + '; '.join(problems)
+        if settings.QUERY_BUDGET_ACTION == 'raise':
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+class QueryBudgetTestMixin:
+    """Test case helpers for keeping views and services inside a query budget."""
+
+    @contextmanager
+    def assertQueryBudget(self, queries=None, time_ms=None, repeats=1):
+        """Fail if the block runs more than ``queries`` queries or repeats any query shape.
+
+        Unlike ``assertNumQueries`` the failure names each repeated query
+        and the template line or code that issued it.
+        """
+        with record_queries() as recorder:
+            yield recorder
+        problems = recorder.problems(queries=queries, time_ms=time_ms, repeats=repeats)
+        if problems:
+            self.fail('Query budget exceeded:\n' + '\n'.join(problems))
@@ -0,0 +1,97 @@
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+PIN_COOKIE = 'db_pin'
+# API clients authenticate with a token and don't keep cookies, so they are pinned by user id
+PIN_KEY = 'db_pin:{}'
+
+# Set per request by ReplicaRoutingMiddleware; everything else reads the primary
+replica_reads_allowed = ContextVar('replica_reads_allowed', default=False)
+
+
+def pin_user(user_id):
+    cache.set(PIN_KEY.format(user_id), 1, settings.REPLICA_PIN_SECONDS)
+
+
+def user_pinned(user_id):
+    return cache.get(PIN_KEY.format(user_id)) is not None
+
+
+class ReplicaRouter:
+    """Send reads to a replica when the current request allows it.
+
+    Writes, migrations and anything inside a transaction on the primary
+    (including ``select_for_update``) always use ``default``.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (
+            settings.DATABASE_REPLICAS
+            and replica_reads_allowed.get()
+            and not connections['default'].in_atomic_block
+        ):
+            return random.choice(settings.DATABASE_REPLICAS)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaRoutingMiddleware:
+    """Allow replica reads for safe requests from users who haven't just written.
+
+    Any unsafe request (enroll, drop, course changes, login, ...) sets a
+    short-lived cookie that pins the user to the primary, so they read
+    their own writes while replicas catch up. Token-authenticated API users
+    are pinned by user id instead (see ``PinnedTokenAuthentication``).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Stay async under ASGI so async views don't hop through a thread here
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = replica_reads_allowed.set(self.allow_replica_reads(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            replica_reads_allowed.reset(token)
+        return self.pin_to_primary(request, response)
+
+    async def __acall__(self, request):
+        token = replica_reads_allowed.set(self.allow_replica_reads(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            replica_reads_allowed.reset(token)
+        return self.pin_to_primary(request, response)
+
+    def allow_replica_reads(self, request):
+        return request.method in ('GET', 'HEAD', 'OPTIONS') and PIN_COOKIE not in request.COOKIES
+
+    def pin_to_primary(self, request, response):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and settings.DATABASE_REPLICAS:
+            response.set_cookie(PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax')
+            # REST framework sets request.auth once it has authenticated a token
+            if getattr(request, 'auth', None) is not None:
+                pin_user(request.user.pk)
+        return response
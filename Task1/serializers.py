@@ -1,5 +1,24 @@
 from rest_framework import serializers
 from .models import User,Course,Student
+from .permissions import can_view_roster
+
+
+class DynamicFieldsMixin:
+    """Limit output to the comma-separated ``?fields=`` query parameter, if given."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = requested_fields(self.context.get('request'))
+        if requested:
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+
+
+def requested_fields(request):
+    if request is None:
+        return set()
+    fields = request.query_params.get('fields', '')
+    return {name.strip() for name in fields.split(',') if name.strip()}
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -24,15 +43,21 @@ class StudentInfoSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email']
 
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     instructor_name = serializers.ReadOnlyField(source='instructor.username')
     enrolled_students = StudentInfoSerializer(source='students', many=True, read_only=True)
     
     class Meta:
         model = Course
-        fields = ['id', 'course_name', 'course_code', 'credits', 'description', 
-                  'instructor', 'instructor_name', 'enrolled_students']
-        read_only_fields = ['instructor']
+        fields = ['id', 'course_name', 'course_code', 'credits', 'description', 'capacity',
+                  'seats_taken', 'instructor', 'instructor_name', 'enrolled_students']
+        read_only_fields = ['instructor', 'seats_taken']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if isinstance(self.instance, Course) and request and not can_view_roster(request.user, self.instance):
+            self.fields.pop('enrolled_students', None)
 
     def validate_course_code(self, value):
         # Skip validation if value is None (happens on partial updates)
@@ -63,14 +88,40 @@ class CourseSerializer(serializers.ModelSerializer):
         
     def update(self, instance, validated_data):
         print(f"Updating instance: {instance.id} with data: {validated_data}")
-        updated_instance = super().update(instance, validated_data)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        # Only save what changed so the seats_taken counter is never overwritten
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        updated_instance = instance
         print(f"After update: {updated_instance.course_name}, {updated_instance.course_code}")
         return updated_instance
 
 
+class CourseListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    # Course listings report how many students are enrolled, not who they are;
+    # the roster has its own paginated endpoint
+    instructor_name = serializers.ReadOnlyField(source='instructor.username')
+    enrolled_count = serializers.ReadOnlyField(source='seats_taken')
+
+    class Meta:
+        model = Course
+        fields = ['id', 'course_name', 'course_code', 'credits', 'description', 'capacity',
+                  'enrolled_count', 'instructor', 'instructor_name']
+        read_only_fields = fields
+
+
 class StudentSerializer(serializers.ModelSerializer):
     courses = serializers.PrimaryKeyRelatedField(many=True, queryset=Course.objects.all())
 
     class Meta:
         model = Student
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+
+class EnrollmentPairSerializer(serializers.Serializer):
+    username = serializers.CharField()
+    course_code = serializers.CharField()
+
+
+class BulkEnrollmentSerializer(serializers.Serializer):
+    enrollments = EnrollmentPairSerializer(many=True, allow_empty=False)
@@ -0,0 +1,298 @@
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, Exists, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Upper
+
+from .caching import invalidate_catalog
+from .metrics import count_outcomes
+from .models import Course, Student, User, WaitlistEntry
+
+MAX_COURSES_PER_STUDENT = 2
+
+# Enrollment outcomes
+ENROLLED = 'enrolled'
+ALREADY_ENROLLED = 'already_enrolled'
+LIMIT_REACHED = 'limit_reached'
+COURSE_NOT_FOUND = 'course_not_found'
+COURSE_FULL = 'course_full'
+DROPPED = 'dropped'
+NOT_ENROLLED = 'not_enrolled'
+WAITLISTED = 'waitlisted'
+ALREADY_WAITLISTED = 'already_waitlisted'
+COURSE_HAS_SEATS = 'course_has_seats'
+LEFT_WAITLIST = 'left_waitlist'
+NOT_WAITLISTED = 'not_waitlisted'
+STUDENT_NOT_FOUND = 'student_not_found'
+
+BULK_ENROLL_BATCH_SIZE = 5000
+
+Enrollment = Student.courses.through
+
+
+@dataclass(frozen=True)
+class EnrollmentResult:
+    status: str
+    course: Optional[Course] = None
+    # Student moved off the waitlist into the seat freed by a drop
+    promoted: Optional[Student] = None
+
+    @property
+    def ok(self):
+        return self.status in (ENROLLED, DROPPED, WAITLISTED, LEFT_WAITLIST)
+
+
+def reserve_seat(course_id):
+    """Take one seat in the course if any are left; returns whether it succeeded.
+
+    This is a single conditional UPDATE, so the course row is only locked for
+    the remainder of the caller's transaction rather than for a read-check-write
+    cycle, and concurrent reservations can never oversubscribe the course.
+    """
+    return Course.objects.filter(
+        Q(capacity__isnull=True) | Q(seats_taken__lt=F('capacity')),
+        id=course_id,
+    ).update(seats_taken=F('seats_taken') + 1) == 1
+
+
+def release_seat(course_id):
+    Course.objects.filter(id=course_id, seats_taken__gt=0).update(seats_taken=F('seats_taken') - 1)
+
+
+def register_user(username, email, role, encoded_password):
+    """Create a user, and a profile for students, from an already hashed password.
+
+    Returns an error message, or ``None`` on success. Hashing happens before
+    this is called so the transaction is never held open for the hasher; the
+    unique constraints on username and email catch duplicates, including
+    concurrent sign-ups, so the existence checks only run once an insert
+    has failed.
+    """
+    user = User(
+        username=User.normalize_username(username),
+        email=User.objects.normalize_email(email),
+        role='Student' if role.lower() == 'student' else 'Faculty',
+        password=encoded_password,
+    )
+    try:
+        with transaction.atomic():
+            user.save()
+            if user.role == 'Student':
+                Student.objects.create(user=user)
+    except IntegrityError:
+        # The error text differs between databases, so look for the clash itself
+        if User.objects.filter(username=user.username).exists():
+            return 'Username already exists'
+        if User.objects.filter(email=user.email).exists():
+            return 'Email already exists'
+        raise
+    return None
+
+
+@count_outcomes
+def enroll_student(student, course_id):
+    """Enroll ``student`` in the course with ``course_id`` if they are under the cap.
+
+    The cap check and the insert run in one transaction while holding a row
+    lock on the student, so concurrent submits by the same student are
+    serialized and can never push them past ``MAX_COURSES_PER_STUDENT``. The
+    seat itself is taken with ``reserve_seat``, which never oversubscribes
+    the course.
+    """
+    if not str(course_id).isdigit():
+        return EnrollmentResult(COURSE_NOT_FOUND)
+
+    student_enrollments = Enrollment.objects.filter(student_id=student.id)
+    with transaction.atomic():
+        # Lock the student row; other enrollments for this student wait here
+        Student.objects.select_for_update().filter(id=student.id).values_list('id').first()
+
+        # Fetch the course, the student's current load and whether they already
+        # hold this course in a single query
+        course = Course.objects.filter(id=course_id).annotate(
+            student_load=Subquery(
+                student_enrollments.values('student_id').annotate(n=Count('id')).values('n')
+            ),
+            already_enrolled=Exists(student_enrollments.filter(course_id=OuterRef('id'))),
+            waitlisted=Exists(WaitlistEntry.objects.filter(student_id=student.id, course_id=OuterRef('id'))),
+        ).first()
+
+        if course is None:
+            return EnrollmentResult(COURSE_NOT_FOUND)
+        if course.already_enrolled:
+            return EnrollmentResult(ALREADY_ENROLLED, course)
+        if (course.student_load or 0) >= MAX_COURSES_PER_STUDENT:
+            return EnrollmentResult(LIMIT_REACHED, course)
+
+        if not reserve_seat(course.id):
+            return EnrollmentResult(COURSE_FULL, course)
+
+        Enrollment.objects.create(student_id=student.id, course_id=course.id)
+        # The through table is written directly, so m2m_changed never fires
+        invalidate_catalog()
+        if course.waitlisted:
+            # A seat opened up directly (e.g. capacity was raised); give up the place in line
+            WaitlistEntry.objects.filter(student_id=student.id, course_id=course.id).delete()
+    return EnrollmentResult(ENROLLED, course)
+
+
+@count_outcomes
+def drop_student(student, course_id):
+    """Remove ``student`` from the course with ``course_id``.
+
+    The freed seat goes to the next eligible waitlisted student in the same
+    transaction, and is only released back to the course if nobody is waiting.
+    """
+    if not str(course_id).isdigit():
+        return EnrollmentResult(COURSE_NOT_FOUND)
+
+    course = Course.objects.filter(id=course_id).first()
+    if course is None:
+        return EnrollmentResult(COURSE_NOT_FOUND)
+
+    with transaction.atomic():
+        deleted, _ = Enrollment.objects.filter(student_id=student.id, course_id=course.id).delete()
+        if not deleted:
+            return EnrollmentResult(NOT_ENROLLED, course)
+        promoted = promote_from_waitlist(course)
+        if promoted is None:
+            release_seat(course.id)
+        invalidate_catalog()
+    return EnrollmentResult(DROPPED, course, promoted)
+
+
+def promote_from_waitlist(course):
+    """Give one seat in ``course`` to the first eligible waitlisted student.
+
+    Must run inside the transaction that freed the seat; the seat counter is
+    left untouched because the seat changes hands rather than being released.
+    Each entry is claimed together with its student in one
+    ``SELECT ... FOR UPDATE SKIP LOCKED``, so concurrent drops never wait on
+    each other's claims, and an entry whose student is busy in
+    ``enroll_student`` is skipped instead of being waited on (that function
+    locks the student first and the entry second, so waiting here could
+    deadlock). Each claim is an index range scan on ``(course, id)`` however
+    long the waitlist grows. Students who are already at the course cap when
+    their turn comes lose their place. Returns the promoted student, or
+    ``None`` if nobody was eligible.
+    """
+    while True:
+        # The student lock keeps their own enrollments from racing the promotion past the cap
+        entry = WaitlistEntry.objects.select_for_update(skip_locked=True, of=('self', 'student')).filter(
+            course_id=course.id
+        ).select_related('student').order_by('id').first()
+        if entry is None:
+            return None
+
+        current = list(Enrollment.objects.filter(student_id=entry.student_id).values_list('course_id', flat=True))
+        entry.delete()
+
+        if course.id not in current and len(current) < MAX_COURSES_PER_STUDENT:
+            Enrollment.objects.create(student_id=entry.student_id, course_id=course.id)
+            return entry.student
+
+
+@count_outcomes
+def join_waitlist(student, course_id):
+    """Put ``student`` in line for a seat in a full course."""
+    if not str(course_id).isdigit():
+        return EnrollmentResult(COURSE_NOT_FOUND)
+
+    course = Course.objects.filter(id=course_id).annotate(
+        already_enrolled=Exists(Enrollment.objects.filter(student_id=student.id, course_id=OuterRef('id'))),
+    ).first()
+    if course is None:
+        return EnrollmentResult(COURSE_NOT_FOUND)
+    if course.already_enrolled:
+        return EnrollmentResult(ALREADY_ENROLLED, course)
+    if course.capacity is None or course.seats_taken < course.capacity:
+        return EnrollmentResult(COURSE_HAS_SEATS, course)
+
+    _, created = WaitlistEntry.objects.get_or_create(student_id=student.id, course_id=course.id)
+    return EnrollmentResult(WAITLISTED if created else ALREADY_WAITLISTED, course)
+
+
+@count_outcomes
+def leave_waitlist(student, course_id):
+    if not str(course_id).isdigit():
+        return EnrollmentResult(COURSE_NOT_FOUND)
+
+    course = Course.objects.filter(id=course_id).first()
+    if course is None:
+        return EnrollmentResult(COURSE_NOT_FOUND)
+
+    deleted, _ = WaitlistEntry.objects.filter(student_id=student.id, course_id=course.id).delete()
+    return EnrollmentResult(LEFT_WAITLIST if deleted else NOT_WAITLISTED, course)
+
+
+@count_outcomes
+def bulk_enroll(pairs, batch_size=BULK_ENROLL_BATCH_SIZE):
+    """Enroll many ``(username, course_code)`` pairs at once.
+
+    Returns one status per pair, in input order. Each batch is validated with
+    a handful of set-based queries and written with a single ``bulk_create``,
+    applying the same course cap and seat limits as ``enroll_student``.
+    """
+    statuses = []
+    for start in range(0, len(pairs), batch_size):
+        statuses.extend(_enroll_batch(pairs[start:start + batch_size]))
+    return statuses
+
+
+def _enroll_batch(pairs):
+    usernames = {username for username, _ in pairs}
+    # Course codes are unique regardless of case (course_code_upper_unique)
+    codes = {code.upper() for _, code in pairs}
+
+    with transaction.atomic():
+        # Lock students before courses, the same order enroll_student uses
+        students = dict(
+            Student.objects.select_for_update(of=('self',)).filter(user__username__in=usernames)
+            .order_by('id').values_list('user__username', 'id')
+        )
+        courses = {}
+        seats = {}
+        for code, course_id, capacity, seats_taken in Course.objects.select_for_update().annotate(
+            code_upper=Upper('course_code')
+        ).filter(code_upper__in=codes).order_by('id').values_list('code_upper', 'id', 'capacity', 'seats_taken'):
+            courses[code] = (course_id, capacity)
+            seats[course_id] = seats_taken
+        existing = set(
+            Enrollment.objects.filter(student_id__in=students.values()).values_list('student_id', 'course_id')
+        )
+        loads = Counter(student_id for student_id, _ in existing)
+
+        statuses = []
+        new_rows = []
+        for username, code in pairs:
+            student_id = students.get(username)
+            course_id, capacity = courses.get(code.upper(), (None, None))
+            if student_id is None:
+                status = STUDENT_NOT_FOUND
+            elif course_id is None:
+                status = COURSE_NOT_FOUND
+            elif (student_id, course_id) in existing:
+                status = ALREADY_ENROLLED
+            elif loads[student_id] >= MAX_COURSES_PER_STUDENT:
+                status = LIMIT_REACHED
+            elif capacity is not None and seats[course_id] >= capacity:
+                status = COURSE_FULL
+            else:
+                status = ENROLLED
+                existing.add((student_id, course_id))
+                loads[student_id] += 1
+                seats[course_id] += 1
+                new_rows.append(Enrollment(student_id=student_id, course_id=course_id))
+            statuses.append(status)
+
+        if new_rows:
+            Enrollment.objects.bulk_create(new_rows, ignore_conflicts=True)
+            # The course rows are locked, so the new counts can be written outright
+            changed = {row.course_id for row in new_rows}
+            Course.objects.filter(id__in=changed).update(seats_taken=Case(
+                *[When(id=course_id, then=Value(seats[course_id])) for course_id in changed]
+            ))
+            invalidate_catalog()
+    return statuses
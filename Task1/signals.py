@@ -0,0 +1,17 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import invalidate_catalog
+from .models import Course, Student
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def course_changed(sender, **kwargs):
+    invalidate_catalog()
+
+
+@receiver(m2m_changed, sender=Student.courses.through)
+def enrollments_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_catalog()
@@ -1,3 +1,1315 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, connections
+from django.template import engines
+from django.template.loader import render_to_string
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+)
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import HASH_SESSION_KEY
+from django.contrib.auth.base_user import AbstractBaseUser
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.urls import resolve, reverse
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from . import loaders, metrics
+from .async_views import INDEX_CACHE_KEY
+from .management.commands.create_student_profile import Command as CreateStudentProfileCommand
+from .authentication import PinnedTokenAuthentication
+from .caching import bump_catalog_version, cached_catalog, catalog_version
+from .hashers import pending_rehashes, rehash_password, schedule_rehash
+from .loaders import gather_queries
+from .models import User, Course, Student, WaitlistEntry
+from .profiler import SamplingProfilerMiddleware, make_token
+from .querybudget import QueryBudgetExceeded, QueryBudgetMiddleware, QueryBudgetTestMixin, record_queries
+from .routers import PIN_COOKIE, ReplicaRouter, ReplicaRoutingMiddleware, replica_reads_allowed
+from .services import (
+    ENROLLED, ALREADY_ENROLLED, LIMIT_REACHED, COURSE_NOT_FOUND, COURSE_FULL, DROPPED, NOT_ENROLLED,
+    WAITLISTED, ALREADY_WAITLISTED, COURSE_HAS_SEATS, LEFT_WAITLIST, STUDENT_NOT_FOUND,
+    MAX_COURSES_PER_STUDENT, enroll_student, drop_student, join_waitlist, leave_waitlist, bulk_enroll
+)
+from .warmup import WARMUP_TEMPLATES, warm_templates
+
+
+def create_user(username, role='Student'):
+    return User.objects.create_user(
+        username=username, email=f'{username}@example.com', password='pass', role=role
+    )
+
+
+def create_student(username):
+    return Student.objects.create(user=create_user(username))
+
+
+def create_courses(instructor, count, start=0):
+    return Course.objects.bulk_create([
+        Course(course_name=f'Course {i}', course_code=f'C{i:05d}', instructor=instructor)
+        for i in range(start, start + count)
+    ])
+
+
+class RegisterViewTests(TestCase):
+    def register(self, **overrides):
+        data = {'username': 'student1', 'email': 'student1@example.com', 'password': 'pass', 'role': 'student'}
+        data.update(overrides)
+        return self.client.post(reverse('register'), data)
+
+    def test_registration_creates_user_and_profile_without_lookups(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.register()
+
+        self.assertRedirects(response, reverse('login'))
+        self.assertTrue(Student.objects.filter(user__username='student1').exists())
+        self.assertFalse(any(q['sql'].startswith('SELECT') for q in ctx.captured_queries))
+
+    def test_duplicates_report_the_same_errors(self):
+        self.register()
+
+        response = self.register(email='other@example.com')
+        self.assertEqual(response.context['error_message'], 'Username already exists')
+
+        response = self.register(username='student2')
+        self.assertEqual(response.context['error_message'], 'Email already exists')
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_duplicate_username_mentioning_email_is_reported_as_username(self):
+        self.register(username='emailfan', email='fan@example.com')
+
+        response = self.register(username='emailfan', email='other@example.com')
+        self.assertEqual(response.context['error_message'], 'Username already exists')
+
+    def test_faculty_registration_has_no_profile(self):
+        self.register(username='faculty1', email='faculty1@example.com', role='faculty')
+
+        user = User.objects.get(username='faculty1')
+        self.assertEqual(user.role, 'Faculty')
+        self.assertFalse(Student.objects.filter(user=user).exists())
+
+
+@override_settings(ROOT_URLCONF='Task1.async_urls')
+class AsyncAuthViewTests(TestCase):
+    def setUp(self):
+        self.user = create_user('student1')
+
+    async def test_login_redirects_to_dashboard(self):
+        response = await self.async_client.post(reverse('login'), {'username': 'student1', 'password': 'pass'})
+
+        self.assertRedirects(response, reverse('student-dashboard'), fetch_redirect_response=False)
+        # The session is logged in, so the login page sends the user straight on
+        response = await self.async_client.get(reverse('login'))
+        self.assertRedirects(response, reverse('student-dashboard'), fetch_redirect_response=False)
+
+    async def test_wrong_or_unknown_credentials_are_rejected(self):
+        for username, password in (('student1', 'wrong'), ('nobody', 'pass')):
+            response = await self.async_client.post(reverse('login'), {'username': username, 'password': password})
+            self.assertEqual(response.context['error_message'], 'Invalid credentials')
+
+    async def test_outdated_hash_is_not_rehashed_in_the_request(self):
+        old_hash = make_password('pass', hasher='pbkdf2_sha1')
+        self.user.password = old_hash
+        await self.user.asave(update_fields=['password'])
+
+        response = await self.async_client.post(reverse('login'), {'username': 'student1', 'password': 'pass'})
+
+        self.assertRedirects(response, reverse('student-dashboard'), fetch_redirect_response=False)
+        await self.user.arefresh_from_db()
+        self.assertEqual(self.user.password, old_hash)
+
+    async def test_registration_creates_user_and_profile(self):
+        response = await self.async_client.post(reverse('register'), {
+            'username': 'student2', 'email': 'student2@example.com', 'password': 'pass', 'role': 'student',
+        })
+
+        self.assertRedirects(response, reverse('login'), fetch_redirect_response=False)
+        self.assertTrue(await Student.objects.filter(user__username='student2').aexists())
+
+        response = await self.async_client.post(reverse('register'), {
+            'username': 'student3', 'email': 'student2@example.com', 'password': 'pass', 'role': 'student',
+        })
+        self.assertEqual(response.context['error_message'], 'Email already exists')
+
+
+class PasswordRehashTests(TestCase):
+    def setUp(self):
+        self.old_hash = make_password('pass', hasher='pbkdf2_sha1')
+        self.user = User.objects.create(
+            username='student1', email='student1@example.com', password=self.old_hash, role='Student'
+        )
+
+    def test_login_queues_the_rehash_instead_of_running_it(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(reverse('login'), {'username': 'student1', 'password': 'pass'})
+
+        self.assertRedirects(response, reverse('student-dashboard'), fetch_redirect_response=False)
+        self.assertEqual(len(callbacks), 1)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.password, self.old_hash)
+
+    def test_rehash_upgrades_to_the_preferred_hasher(self):
+        rehash_password(self.user.id, 'pass', self.old_hash)
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith(get_hasher().algorithm + '$'))
+        self.assertTrue(self.user.check_password('pass'))
+
+    def test_rehash_does_not_overwrite_a_changed_password(self):
+        self.user.set_password('new-pass')
+        self.user.save()
+
+        rehash_password(self.user.id, 'pass', self.old_hash)
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('new-pass'))
+
+    @override_settings(PASSWORD_REHASH_QUEUE_SIZE=1)
+    def test_rehashes_past_the_queue_size_are_dropped(self):
+        pending_rehashes.add(-1)
+        self.addCleanup(pending_rehashes.discard, -1)
+
+        with mock.patch('Task1.hashers.get_rehash_executor') as executor:
+            with self.captureOnCommitCallbacks(execute=True):
+                schedule_rehash(self.user.id, 'pass', self.old_hash)
+
+        executor.assert_not_called()
+        self.assertEqual(pending_rehashes, {-1})
+
+    @override_settings(PASSWORD_REHASH_WORKERS=0)
+    def test_rehash_runs_inline_without_workers(self):
+        self.assertTrue(self.user.check_password('pass'))
+        self.assertTrue(self.user.password.startswith(get_hasher().algorithm + '$'))
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith(get_hasher().algorithm + '$'))
+
+    def assertStaysSignedIn(self):
+        response = self.client.get(reverse('student-dashboard'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_rehash_keeps_the_user_signed_in(self):
+        Student.objects.create(user=self.user)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post(reverse('login'), {'username': 'student1', 'password': 'pass'})
+        # What the background worker runs once the login commits
+        rehash_password(self.user.id, 'pass', self.old_hash)
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertStaysSignedIn()
+
+    @override_settings(PASSWORD_REHASH_WORKERS=0)
+    def test_inline_rehash_keeps_the_user_signed_in(self):
+        Student.objects.create(user=self.user)
+        self.client.post(reverse('login'), {'username': 'student1', 'password': 'pass'})
+
+        self.user.refresh_from_db()
+        self.assertNotEqual(self.user.password, self.old_hash)
+        self.assertStaysSignedIn()
+
+    @override_settings(ROOT_URLCONF='Task1.async_urls', PASSWORD_REHASH_WORKERS=0)
+    def test_async_login_rehash_keeps_the_user_signed_in(self):
+        Student.objects.create(user=self.user)
+        self.client.post(reverse('login'), {'username': 'student1', 'password': 'pass'})
+
+        self.user.refresh_from_db()
+        self.assertNotEqual(self.user.password, self.old_hash)
+        self.assertStaysSignedIn()
+
+    def test_password_change_signs_out_other_sessions(self):
+        Student.objects.create(user=self.user)
+        self.client.force_login(self.user)
+
+        self.user.set_password('new-pass')
+        self.user.save()
+
+        response = self.client.get(reverse('student-dashboard'))
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.url.startswith(reverse('login')))
+
+    def test_sessions_keyed_on_the_password_hash_are_still_accepted(self):
+        Student.objects.create(user=self.user)
+        self.client.force_login(self.user)
+        session = self.client.session
+        # A session created before users had a session_token
+        session[HASH_SESSION_KEY] = AbstractBaseUser._get_session_auth_hash(self.user)
+        session.save()
+
+        self.assertStaysSignedIn()
+        self.assertEqual(self.client.session[HASH_SESSION_KEY], self.user.get_session_auth_hash())
+
+    def test_report_counts_users_per_hasher(self):
+        create_user('student2')
+        out = StringIO()
+
+        call_command('password_hash_report', stdout=out)
+
+        report = out.getvalue()
+        self.assertIn('pbkdf2_sha1 iterations=', report)
+        self.assertIn('1 users (needs upgrade)', report)
+        self.assertIn(f'1 of 2 users will be rehashed to {get_hasher().algorithm}', report)
+
+
+class StudentDashboardQueryTests(TestCase):
+    def setUp(self):
+        self.faculty = create_user('faculty1', role='Faculty')
+        self.user = create_user('student1')
+        self.student = Student.objects.create(user=self.user)
+        self.client.force_login(self.user)
+        cache.clear()
+
+    def count_dashboard_queries(self):
+        # Measure the cold path; catalog pages are otherwise served from cache
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('student-dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx)
+
+    def test_query_count_is_constant_as_catalog_grows(self):
+        courses = create_courses(self.faculty, 3)
+        self.student.courses.add(courses[0], courses[1])
+        small = self.count_dashboard_queries()
+
+        create_courses(self.faculty, 50, start=3)
+        large = self.count_dashboard_queries()
+
+        self.assertEqual(small, large)
+
+    def test_enrolled_courses_are_excluded_from_available(self):
+        courses = create_courses(self.faculty, 3)
+        self.student.courses.add(courses[0])
+
+        response = self.client.get(reverse('student-dashboard'))
+
+        self.assertEqual(response.context['enrolled_courses'], [courses[0]])
+        self.assertEqual(
+            sorted(c.id for c in response.context['available_courses']),
+            [courses[1].id, courses[2].id],
+        )
+        self.assertTrue(response.context['can_enroll'])
+
+
+class StudentDashboardPaginationTests(TestCase):
+    def setUp(self):
+        self.faculty = create_user('faculty1', role='Faculty')
+        self.user = create_user('student1')
+        Student.objects.create(user=self.user)
+        self.client.force_login(self.user)
+        cache.clear()
+
+    def test_available_courses_are_paginated_by_cursor(self):
+        courses = create_courses(self.faculty, 25)
+        url = reverse('student-dashboard')
+
+        first = self.client.get(url)
+        self.assertEqual(list(first.context['available_courses']), courses[:20])
+        self.assertEqual(first.context['next_query'], f'after={courses[19].id}')
+
+        second = self.client.get(f"{url}?{first.context['next_query']}")
+        self.assertEqual(list(second.context['available_courses']), courses[20:])
+        self.assertIsNone(second.context['next_query'])
+
+    def test_available_courses_are_filtered(self):
+        other = create_user('faculty2', role='Faculty')
+        Course.objects.create(course_name='Algebra', course_code='MATH101', credits=4, instructor=self.faculty)
+        Course.objects.create(course_name='Geometry', course_code='MATH201', credits=3, instructor=other)
+        Course.objects.create(course_name='Poetry', course_code='ENG101', credits=3, instructor=other)
+        url = reverse('student-dashboard')
+
+        def codes(**params):
+            response = self.client.get(url, params)
+            return [c.course_code for c in response.context['available_courses']]
+
+        self.assertEqual(codes(code='math'), ['MATH101', 'MATH201'])
+        self.assertEqual(codes(name='etry'), ['MATH201', 'ENG101'])
+        self.assertEqual(codes(instructor='faculty2', credits='3'), ['MATH201', 'ENG101'])
+        self.assertEqual(codes(credits='4'), ['MATH101'])
+        self.assertEqual(codes(credits='abc'), ['MATH101', 'MATH201', 'ENG101'])
+
+
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        self.faculty = create_user('faculty1', role='Faculty')
+        self.user = create_user('student1')
+        Student.objects.create(user=self.user)
+        cache.clear()
+
+    def dashboard_codes(self):
+        response = self.client.get(reverse('student-dashboard'))
+        return [c.course_code for c in response.context['available_courses']]
+
+    def test_catalog_page_is_served_from_cache(self):
+        create_courses(self.faculty, 3)
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as cold:
+            self.client.get(reverse('student-dashboard'))
+
+        with CaptureQueriesContext(connection) as warm:
+            response = self.client.get(reverse('student-dashboard'))
+
+        self.assertEqual(len(warm), len(cold) - 1)
+        self.assertEqual(len(response.context['available_courses']), 3)
+
+    def test_cached_page_still_hides_enrolled_courses(self):
+        courses = create_courses(self.faculty, 3)
+        self.client.force_login(self.user)
+        self.dashboard_codes()
+
+        enroll_student(self.user.student_profile, courses[0].id)
+
+        self.assertEqual(self.dashboard_codes(), ['C00001', 'C00002'])
+
+    def test_faculty_changes_invalidate_catalog(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.dashboard_codes(), [])
+
+        self.client.force_login(self.faculty)
+        self.client.post(reverse('faculty-dashboard'), {
+            'action': 'create', 'name': 'Algebra', 'code': 'MATH101', 'credits': 4,
+        })
+
+        self.client.force_login(self.user)
+        self.assertEqual(self.dashboard_codes(), ['MATH101'])
+
+
+    def test_enrollment_changes_bump_catalog_version(self):
+        course = create_courses(self.faculty, 1)[0]
+        student = self.user.student_profile
+
+        for change in (
+            lambda: enroll_student(student, course.id),
+            lambda: drop_student(student, course.id),
+            lambda: student.courses.add(course),
+            lambda: course.save(),
+            lambda: course.delete(),
+        ):
+            before = catalog_version()
+            change()
+            self.assertNotEqual(catalog_version(), before)
+
+    def test_api_listing_uses_versioned_cache(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        course = Course.objects.create(course_name='Algebra', course_code='MATH101', instructor=self.faculty)
+        client.get(reverse('course-list'))
+
+        course.course_name = 'Linear Algebra'
+        course.save()
+        response = client.get(reverse('course-list'))
+
+        self.assertEqual(response.data['results'][0]['course_name'], 'Linear Algebra')
+
+
+    def test_course_cards_are_cached_until_course_changes(self):
+        course = Course.objects.create(course_name='Algebra', course_code='MATH101', instructor=self.faculty)
+        self.client.force_login(self.faculty)
+        self.client.get(reverse('faculty-dashboard'))
+
+        # A raw update leaves updated_at alone, so the rendered card is reused...
+        Course.objects.filter(id=course.id).update(course_name='Renamed')
+        bump_catalog_version()
+        self.assertContains(self.client.get(reverse('faculty-dashboard')), 'Algebra')
+
+        # ...while a save moves updated_at and re-renders it
+        course.refresh_from_db()
+        course.save()
+        response = self.client.get(reverse('faculty-dashboard'))
+        self.assertContains(response, 'Renamed')
+        self.assertNotContains(response, 'Algebra')
+
+    def test_student_course_cards_follow_instructor_renames(self):
+        create_courses(self.faculty, 1)
+        self.client.force_login(self.user)
+        self.assertContains(self.client.get(reverse('student-dashboard')), 'faculty1')
+
+        User.objects.filter(id=self.faculty.id).update(username='prof-renamed')
+        # Let the catalog page go too, as it would after CATALOG_CACHE_TIMEOUT
+        bump_catalog_version()
+        response = self.client.get(reverse('student-dashboard'))
+        self.assertContains(response, 'prof-renamed')
+        self.assertNotContains(response, 'faculty1')
+
+
+class FacultyDashboardQueryTests(TestCase):
+    def setUp(self):
+        self.faculty = create_user('faculty1', role='Faculty')
+        self.client.force_login(self.faculty)
+
+    def count_dashboard_queries(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('faculty-dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx), response
+
+    def test_query_count_is_constant_as_courses_grow(self):
+        create_courses(self.faculty, 2)
+        small, _ = self.count_dashboard_queries()
+
+        create_courses(self.faculty, 30, start=2)
+        large, _ = self.count_dashboard_queries()
+
+        self.assertEqual(small, large)
+
+    def test_courses_are_annotated_with_enrollment_counts(self):
+        courses = create_courses(self.faculty, 2)
+        for i in range(3):
+            create_student(f'student{i}').courses.add(courses[0])
+
+        _, response = self.count_dashboard_queries()
+
+        counts = {c.id: c.enrolled_count for c in response.context['courses']}
+        self.assertEqual(counts, {courses[0].id: 3, courses[1].id: 0})
+
+
+@override_settings(ROOT_URLCONF='Task1.async_urls')
+class AsyncDashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.faculty = create_user('faculty1', role='Faculty')
+        self.user = create_user('student1')
+        self.courses = create_courses(self.faculty, 25)
+
+    async def login(self, user):
+        await sync_to_async(self.async_client.force_login)(user)
+
+    async def test_student_dashboard_pages_the_catalog(self):
+        await self.login(self.user)
+        student = await Student.objects.acreate(user=self.user)
+        await sync_to_async(student.courses.add)(self.courses[0])
+
+        response = await self.async_client.get(reverse('student-dashboard'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c.id for c in response.context['enrolled_courses']], [self.courses[0].id])
+        self.assertEqual(
+            [c.id for c in response.context['available_courses']], [c.id for c in self.courses[1:21]]
+        )
+        self.assertIsNotNone(response.context['next_query'])
+
+    async def test_student_actions_go_through_the_services(self):
+        await self.login(self.user)
+
+        response = await self.async_client.post(
+            reverse('student-dashboard'), {'action': 'enroll', 'course_id': self.courses[0].id}
+        )
+
+        self.assertRedirects(response, reverse('student-dashboard'), fetch_redirect_response=False)
+        self.assertTrue(await Student.courses.through.objects.filter(
+            student__user=self.user, course=self.courses[0]
+        ).aexists())
+
+    async def test_faculty_dashboard_lists_own_courses(self):
+        await self.login(self.faculty)
+
+        response = await self.async_client.get(reverse('faculty-dashboard'))
+
+        self.assertEqual(len(response.context['courses']), 25)
+        self.assertEqual(response.context['courses'][0].enrolled_count, 0)
+
+    async def test_wrong_role_and_anonymous_users_are_redirected(self):
+        response = await self.async_client.get(reverse('student-dashboard'))
+        self.assertRedirects(response, '/login/?next=/student-dashboard/', fetch_redirect_response=False)
+
+        await self.login(self.faculty)
+        response = await self.async_client.get(reverse('student-dashboard'))
+        self.assertRedirects(response, reverse('login'), fetch_redirect_response=False)
+
+    async def test_index_is_cached(self):
+        response = await self.async_client.get(reverse('index'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('max-age=900', response['Cache-Control'])
+        self.assertIsNotNone(await cache.aget(INDEX_CACHE_KEY))
+
+
+class QueryFanOutTests(SimpleTestCase):
+    @override_settings(DASHBOARD_QUERY_CONNECTIONS=2)
+    async def test_queries_overlap_within_the_connection_budget(self):
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def query(value):
+            def run():
+                with lock:
+                    running.append(value)
+                    peak.append(len(running))
+                time.sleep(0.05)
+                with lock:
+                    running.remove(value)
+                return value
+            return run
+
+        results = await gather_queries(*(query(i) for i in range(4)))
+
+        self.assertEqual(results, [0, 1, 2, 3])
+        self.assertEqual(max(peak), 2)
+
+
+@override_settings(ROOT_URLCONF='Task1.async_urls')
+class StudentDashboardFanOutTests(TransactionTestCase):
+    async def test_dashboard_reads_run_on_separate_connections(self):
+        faculty = await User.objects.acreate(username='faculty1', email='faculty1@example.com', role='Faculty')
+        user = await User.objects.acreate(username='student1', email='student1@example.com', role='Student')
+        courses = await sync_to_async(create_courses)(faculty, 5)
+        student = await Student.objects.acreate(user=user)
+        await sync_to_async(student.courses.add)(courses[0])
+        await sync_to_async(self.async_client.force_login)(user)
+        cache.clear()
+
+        threads = set()
+        original = loaders.run_query
+
+        def record_thread(func):
+            threads.add(threading.current_thread().name)
+            return original(func)
+
+        with mock.patch.object(loaders, 'run_query', record_thread):
+            response = await self.async_client.get(reverse('student-dashboard'))
+
+        self.assertEqual([c.id for c in response.context['enrolled_courses']], [courses[0].id])
+        self.assertEqual([c.id for c in response.context['available_courses']], [c.id for c in courses[1:]])
+        self.assertTrue(threads)
+        self.assertTrue(all(name.startswith('dashboard-query') for name in threads))
+
+
+class QueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.faculty = create_user('faculty1', role='Faculty')
+        self.user = create_user('student1')
+        self.student = Student.objects.create(user=self.user)
+        self.courses = create_courses(self.faculty, 25)
+        self.student.courses.add(*self.courses[:2])
+
+    def test_dashboards_have_no_repeated_queries(self):
+        self.client.force_login(self.user)
+        with self.assertQueryBudget(queries=10):
+            self.client.get(reverse('student-dashboard'))
+
+        self.client.force_login(self.faculty)
+        with self.assertQueryBudget(queries=6):
+            self.client.get(reverse('faculty-dashboard'))
+
+    def test_n_plus_one_is_traced_to_the_template_line(self):
+        # Courses without their instructors joined in, as the dashboard once had
+        context = {'enrolled_courses': [], 'available_courses': list(Course.objects.all()), 'waitlisted_ids': set()}
+
+        with self.assertRaises(AssertionError) as failure:
+            with self.assertQueryBudget():
+                render_to_string('student-dashboard.html', context)
+
+        self.assertIn('possible N+1: 25 x', str(failure.exception))
+        self.assertRegex(str(failure.exception), r'from student-dashboard\.html:\d+')
+
+    def test_code_origin_is_reported_outside_templates(self):
+        with record_queries() as recorder:
+            for course in Course.objects.all()[:3]:
+                course.instructor.username
+
+        (count, query), = recorder.repeated(1)
+        self.assertEqual(count, 3)
+        self.assertTrue(query.origin.startswith('Task1/tests.py:'))
+
+    @override_settings(QUERY_BUDGETS={'student-dashboard': {'queries': 1}})
+    def test_middleware_logs_requests_over_budget(self):
+        self.client.force_login(self.user)
+
+        with self.assertLogs('Task1.querybudget', 'WARNING') as logs:
+            self.client.get(reverse('student-dashboard'))
+
+        self.assertIn('GET /student-dashboard/ (student-dashboard)', logs.output[0])
+        self.assertIn('(budget 1)', logs.output[0])
+
+    @override_settings(QUERY_BUDGETS={'student-dashboard': {'queries': 1}}, QUERY_BUDGET_ACTION='raise')
+    def test_middleware_can_raise(self):
+        self.client.force_login(self.user)
+
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse('student-dashboard'))
+
+    @override_settings(QUERY_BUDGET_ENABLED=False)
+    def test_middleware_is_skipped_when_disabled(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            QueryBudgetMiddleware(lambda request: HttpResponse())
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.counters.clear()
+        metrics.histograms.clear()
+        self.faculty = create_user('faculty1', role='Faculty')
+        self.user = create_user('student1')
+        self.student = Student.objects.create(user=self.user)
+        self.courses = create_courses(self.faculty, 3)
+
+    def scrape(self, **headers):
+        return self.client.get(reverse('metrics'), **headers)
+
+    def test_requests_are_timed_by_url_name(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('student-dashboard'))
+
+        body = self.scrape().content.decode()
+        self.assertIn('http_requests_total{view="student-dashboard",method="GET",status="200"} 1', body)
+        self.assertIn('http_request_duration_seconds_bucket{view="student-dashboard",le="+Inf"} 1', body)
+        self.assertIn('http_request_duration_seconds_count{view="student-dashboard"} 1', body)
+        self.assertRegex(body, r'db_queries_total\{view="student-dashboard"\} [1-9]')
+        self.assertIn('template_render_duration_seconds_count{template="student-dashboard.html"} 1', body)
+        self.assertIn('cache_requests_total{cache="available",result="miss"} 1', body)
+
+    def test_enrollment_outcomes_are_counted(self):
+        enroll_student(self.student, self.courses[0].id)
+        enroll_student(self.student, self.courses[0].id)
+        bulk_enroll([('student1', 'C00001'), ('nobody', 'C00001')])
+
+        body = self.scrape().content.decode()
+        self.assertIn('enrollment_outcomes_total{operation="enroll_student",status="enrolled"} 1', body)
+        self.assertIn('enrollment_outcomes_total{operation="enroll_student",status="already_enrolled"} 1', body)
+        self.assertIn('enrollment_outcomes_total{operation="bulk_enroll",status="student_not_found"} 1', body)
+
+    def test_histogram_buckets_are_cumulative(self):
+        for seconds in (0.001, 0.02, 30):
+            metrics.observe('http_request_duration_seconds', (('view', 'login'),), seconds)
+
+        body = metrics.exposition()
+        self.assertIn('http_request_duration_seconds_bucket{view="login",le="0.005"} 1', body)
+        self.assertIn('http_request_duration_seconds_bucket{view="login",le="0.025"} 2', body)
+        self.assertIn('http_request_duration_seconds_bucket{view="login",le="10.0"} 2', body)
+        self.assertIn('http_request_duration_seconds_bucket{view="login",le="+Inf"} 3', body)
+        self.assertIn('http_request_duration_seconds_count{view="login"} 3', body)
+
+    def test_samples_from_all_worker_processes_are_added_up(self):
+        metrics.inc('http_requests_total', (('view', 'login'), ('method', 'POST'), ('status', '302')), 2)
+        with tempfile.TemporaryDirectory() as metrics_dir, self.settings(METRICS_DIR=metrics_dir):
+            # Another worker's flushed samples
+            with open(os.path.join(metrics_dir, 'metrics_99999.json'), 'w') as f:
+                json.dump([[['http_requests_total', [['view', 'login'], ['method', 'POST'], ['status', '302']], 3]], []], f)
+
+            body = metrics.exposition()
+            self.assertTrue(os.path.exists(os.path.join(metrics_dir, f'metrics_{os.getpid()}.json')))
+
+        self.assertIn('http_requests_total{view="login",method="POST",status="302"} 5', body)
+
+    def test_flush_creates_the_directory(self):
+        with tempfile.TemporaryDirectory() as parent:
+            metrics_dir = os.path.join(parent, 'metrics')
+            with self.settings(METRICS_DIR=metrics_dir):
+                metrics.flush()
+            self.assertTrue(os.path.exists(os.path.join(metrics_dir, f'metrics_{os.getpid()}.json')))
+
+    def test_unwritable_directory_does_not_fail_requests(self):
+        with tempfile.NamedTemporaryFile() as not_a_dir, self.settings(METRICS_DIR=not_a_dir.name):
+            metrics.next_flush = 0.0
+            with self.assertLogs('Task1.metrics', 'ERROR'):
+                response = self.client.get(reverse('login'))
+            self.assertEqual(response.status_code, 200)
+
+            with self.assertLogs('Task1.metrics', 'ERROR'):
+                body = self.scrape().content.decode()
+        self.assertIn('http_requests_total{view="login",method="GET",status="200"} 1', body)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token_is_required_when_configured(self):
+        self.assertEqual(self.scrape().status_code, 403)
+        response = self.scrape(HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+
+class SamplingProfilerTests(SimpleTestCase):
+    def setUp(self):
+        profile_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(profile_dir.cleanup)
+        self.profile_dir = profile_dir.name
+        settings = self.settings(PROFILER_DIR=self.profile_dir, PROFILER_SAMPLE_RATE=0, PROFILER_INTERVAL_MS=1)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def render_for_a_while(self, request):
+        template = engines['django'].from_string('{% for i in items %}{{ i }}{% endfor %}')
+        deadline = time.perf_counter() + 0.1
+        while time.perf_counter() < deadline:
+            template.render({'items': range(200)})
+        return HttpResponse('ok')
+
+    def request(self, **headers):
+        request = RequestFactory().get('/student-dashboard/', **headers)
+        request.resolver_match = resolve('/student-dashboard/')
+        return request
+
+    def profiles(self):
+        return sorted(os.listdir(self.profile_dir))
+
+    @override_settings(PROFILER_DIR='')
+    def test_not_installed_without_a_directory(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            SamplingProfilerMiddleware(self.render_for_a_while)
+
+    def test_signed_header_writes_collapsed_stacks(self):
+        middleware = SamplingProfilerMiddleware(self.render_for_a_while)
+        response = middleware(self.request(HTTP_X_PROFILE=make_token()))
+
+        self.assertEqual(self.profiles(), [response['X-Profile-File']])
+        self.assertIn('-student-dashboard-', response['X-Profile-File'])
+        with open(os.path.join(self.profile_dir, response['X-Profile-File'])) as f:
+            lines = f.read().splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            self.assertRegex(line, r'^\[\w+\];\S.* \d+$')
+        # Rendering dominates, and the stacks lead back to the view that rendered
+        template_samples = sum(int(line.rsplit(' ', 1)[1]) for line in lines if line.startswith('[template];'))
+        self.assertGreater(template_samples, sum(int(line.rsplit(' ', 1)[1]) for line in lines) / 2)
+        self.assertTrue(any('Task1/tests.py:render_for_a_while' in line for line in lines))
+
+    def test_bad_or_missing_header_is_not_profiled(self):
+        middleware = SamplingProfilerMiddleware(self.render_for_a_while)
+        response = middleware(self.request(HTTP_X_PROFILE=make_token() + 'x'))
+        middleware(self.request())
+
+        self.assertNotIn('X-Profile-File', response)
+        self.assertEqual(self.profiles(), [])
+
+    @override_settings(PROFILER_SAMPLE_RATE=1)
+    def test_requests_are_profiled_at_the_sample_rate(self):
+        middleware = SamplingProfilerMiddleware(self.render_for_a_while)
+        response = middleware(self.request())
+
+        # Sampled requests are profiled quietly
+        self.assertNotIn('X-Profile-File', response)
+        self.assertEqual(len(self.profiles()), 1)
+
+    @override_settings(PROFILER_SAMPLE_RATE=1)
+    def test_async_requests_are_profiled(self):
+        async def get_response(request):
+            return await sync_to_async(self.render_for_a_while)(request)
+
+        middleware = SamplingProfilerMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        async_to_sync(middleware)(self.request())
+
+        self.assertEqual(len(self.profiles()), 1)
+
+
+class EnrollmentServiceTests(TestCase):
+    def setUp(self):
+        self.faculty = create_user('faculty1', role='Faculty')
+        self.student = create_student('student1')
+        self.courses = create_courses(self.faculty, MAX_COURSES_PER_STUDENT + 1)
+
+    def test_enroll_returns_structured_results(self):
+        first = enroll_student(self.student, self.courses[0].id)
+        self.assertTrue(first.ok)
+        self.assertEqual(first.course, self.courses[0])
+
+        self.assertEqual(enroll_student(self.student, self.courses[0].id).status, ALREADY_ENROLLED)
+        self.assertEqual(enroll_student(self.student, 999999).status, COURSE_NOT_FOUND)
+        self.assertEqual(enroll_student(self.student, 'abc').status, COURSE_NOT_FOUND)
+
+    def test_enroll_enforces_cap(self):
+        for course in self.courses[:MAX_COURSES_PER_STUDENT]:
+            self.assertEqual(enroll_student(self.student, course.id).status, ENROLLED)
+
+        result = enroll_student(self.student, self.courses[-1].id)
+
+        self.assertEqual(result.status, LIMIT_REACHED)
+        self.assertEqual(self.student.courses.count(), MAX_COURSES_PER_STUDENT)
+
+    def test_dashboard_post_enrolls_through_service(self):
+        self.client.force_login(self.student.user)
+
+        response = self.client.post(
+            reverse('student-dashboard'), {'action': 'enroll', 'course_id': self.courses[0].id}
+        )
+
+        self.assertRedirects(response, reverse('student-dashboard'))
+        self.assertEqual(list(self.student.courses.all()), [self.courses[0]])
+
+
+class WaitlistTests(TestCase):
+    def setUp(self):
+        self.faculty = create_user('faculty1', role='Faculty')
+        self.course = Course.objects.create(
+            course_name='Seminar', course_code='SEM100', capacity=1, instructor=self.faculty
+        )
+        self.students = [create_student(f'student{i}') for i in range(3)]
+        enroll_student(self.students[0], self.course.id)
+
+    def test_join_waitlist_only_when_full(self):
+        open_course = Course.objects.create(course_name='Open', course_code='OPN100', instructor=self.faculty)
+
+        self.assertEqual(join_waitlist(self.students[1], open_course.id).status, COURSE_HAS_SEATS)
+        self.assertEqual(join_waitlist(self.students[0], self.course.id).status, ALREADY_ENROLLED)
+        self.assertEqual(join_waitlist(self.students[1], self.course.id).status, WAITLISTED)
+        self.assertEqual(join_waitlist(self.students[1], self.course.id).status, ALREADY_WAITLISTED)
+        self.assertEqual(leave_waitlist(self.students[1], self.course.id).status, LEFT_WAITLIST)
+
+    def test_drop_promotes_next_in_line(self):
+        join_waitlist(self.students[1], self.course.id)
+        join_waitlist(self.students[2], self.course.id)
+
+        result = drop_student(self.students[0], self.course.id)
+
+        self.assertEqual(result.promoted, self.students[1])
+        self.assertEqual(list(self.course.students.all()), [self.students[1]])
+        self.assertEqual(list(WaitlistEntry.objects.values_list('student', flat=True)), [self.students[2].id])
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.seats_taken, 1)
+
+    def test_promotion_skips_students_at_cap(self):
+        join_waitlist(self.students[1], self.course.id)
+        join_waitlist(self.students[2], self.course.id)
+        for course in create_courses(self.faculty, MAX_COURSES_PER_STUDENT):
+            enroll_student(self.students[1], course.id)
+
+        result = drop_student(self.students[0], self.course.id)
+
+        self.assertEqual(result.promoted, self.students[2])
+        self.assertFalse(WaitlistEntry.objects.exists())
+
+    def test_drop_without_waitlist_releases_seat(self):
+        result = drop_student(self.students[0], self.course.id)
+
+        self.assertIsNone(result.promoted)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.seats_taken, 0)
+
+    def test_dashboard_shows_waitlist_position(self):
+        cache.clear()
+        join_waitlist(self.students[1], self.course.id)
+        join_waitlist(self.students[2], self.course.id)
+        self.client.force_login(self.students[2].user)
+
+        response = self.client.get(reverse('student-dashboard'))
+
+        self.assertEqual([entry.position for entry in response.context['waitlist']], [2])
+        self.assertContains(response, 'You are on the waitlist for this course.')
+
+
+class CourseApiTests(TestCase):
+    def setUp(self):
+        self.faculty = create_user('faculty1', role='Faculty')
+        self.user = create_user('student1')
+        self.student = Student.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+        cache.clear()
+
+    def enroll_students(self, course, count):
+        for i in range(count):
+            user = User.objects.create(username=f'{course.course_code}-{i}', email=f'{course.course_code}-{i}@example.com')
+            Student.objects.create(user=user).courses.add(course)
+
+    def count_list_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx), response
+
+    def test_requires_token(self):
+        response = APIClient().get(reverse('course-list'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_list_query_count_is_constant(self):
+        courses = create_courses(self.faculty, 2)
+        self.enroll_students(courses[0], 2)
+        small, _ = self.count_list_queries(reverse('course-list'))
+
+        for course in create_courses(self.faculty, 10, start=2):
+            self.enroll_students(course, 3)
+        large, response = self.count_list_queries(reverse('course-list'))
+
+        self.assertEqual(small, large)
+        self.assertEqual(len(response.data['results']), 12)
+
+    def test_list_is_cursor_paginated(self):
+        create_courses(self.faculty, 5)
+
+        first = self.client.get(reverse('course-list'), {'page_size': 3})
+        second = self.client.get(first.data['next'])
+
+        self.assertEqual([c['course_code'] for c in first.data['results']], ['C00000', 'C00001', 'C00002'])
+        self.assertEqual([c['course_code'] for c in second.data['results']], ['C00003', 'C00004'])
+        self.assertIsNone(second.data['next'])
+
+    def test_list_reports_counts_without_roster(self):
+        course = create_courses(self.faculty, 1)[0]
+        enroll_student(self.student, course.id)
+
+        response = self.client.get(reverse('course-list'))
+
+        self.assertEqual(response.data['results'][0]['enrolled_count'], 1)
+        self.assertNotIn('enrolled_students', response.data['results'][0])
+
+    def test_field_selection_skips_roster(self):
+        course = create_courses(self.faculty, 1)[0]
+        self.enroll_students(course, 2)
+        url = reverse('course-detail', args=[course.id])
+        self.client.force_authenticate(self.faculty)
+
+        full, response = self.count_list_queries(url)
+        self.assertEqual(len(response.data['enrolled_students']), 2)
+        slim, response = self.count_list_queries(f'{url}?fields=id,course_code')
+
+        self.assertEqual(response.data, {'id': course.id, 'course_code': 'C00000'})
+        self.assertLess(slim, full)
+
+    def test_detail_shows_roster_only_to_instructor_and_staff(self):
+        course = create_courses(self.faculty, 1)[0]
+        self.enroll_students(course, 2)
+        url = reverse('course-detail', args=[course.id])
+
+        # Students and other faculty get the course without who is in it
+        self.assertNotIn('enrolled_students', self.client.get(url).data)
+        self.client.force_authenticate(create_user('faculty2', role='Faculty'))
+        self.assertNotIn('enrolled_students', self.client.get(url).data)
+
+        registrar = User.objects.create(username='registrar', email='registrar@example.com', is_staff=True)
+        for user in (self.faculty, registrar):
+            self.client.force_authenticate(user)
+            response = self.client.get(url)
+            self.assertEqual([s['email'] for s in response.data['enrolled_students']],
+                             ['C00000-0@example.com', 'C00000-1@example.com'])
+
+    def test_roster_is_paginated(self):
+        course = create_courses(self.faculty, 1)[0]
+        self.enroll_students(course, 3)
+        url = reverse('course-students', args=[course.id])
+        self.client.force_authenticate(self.faculty)
+
+        first = self.client.get(url, {'page_size': 2})
+        second = self.client.get(first.data['next'])
+
+        self.assertEqual([s['username'] for s in first.data['results']], ['C00000-0', 'C00000-1'])
+        self.assertEqual([s['username'] for s in second.data['results']], ['C00000-2'])
+
+    def test_roster_is_limited_to_instructor_and_staff(self):
+        course = create_courses(self.faculty, 1)[0]
+        self.enroll_students(course, 1)
+        url = reverse('course-students', args=[course.id])
+
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_authenticate(create_user('faculty2', role='Faculty'))
+        self.assertEqual(self.client.get(url).status_code, 403)
+        registrar = User.objects.create(username='registrar', email='registrar@example.com', is_staff=True)
+        self.client.force_authenticate(registrar)
+        self.assertEqual(self.client.get(url).data['results'][0]['email'], 'C00000-0@example.com')
+
+    def test_only_faculty_can_create(self):
+        payload = {'course_name': 'Algebra', 'course_code': 'MATH101', 'credits': 4}
+        self.assertEqual(self.client.post(reverse('course-list'), payload).status_code, 403)
+
+        faculty_client = APIClient()
+        faculty_client.force_authenticate(self.faculty)
+        response = faculty_client.post(reverse('course-list'), payload)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Course.objects.get(course_code='MATH101').instructor, self.faculty)
+
+
+class BulkEnrollmentTests(TestCase):
+    def setUp(self):
+        self.faculty = create_user('faculty1', role='Faculty')
+        self.courses = create_courses(self.faculty, 3)
+        Course.objects.filter(id=self.courses[2].id).update(capacity=1)
+        for i in range(3):
+            Student.objects.create(user=User.objects.create(username=f'student{i}', email=f'student{i}@example.com'))
+
+    def test_bulk_enroll_validates_each_row(self):
+        statuses = bulk_enroll([
+            ('student0', 'C00000'),
+            ('student0', 'C00000'),
+            ('student0', 'C00001'),
+            ('student0', 'C00002'),
+            ('student1', 'C00002'),
+            ('student2', 'C00002'),
+            ('nobody', 'C00000'),
+            ('student2', 'NOPE'),
+        ], batch_size=3)
+
+        self.assertEqual(statuses, [
+            ENROLLED, ALREADY_ENROLLED, ENROLLED, LIMIT_REACHED,
+            ENROLLED, COURSE_FULL, STUDENT_NOT_FOUND, COURSE_NOT_FOUND,
+        ])
+        seats = dict(Course.objects.values_list('course_code', 'seats_taken'))
+        self.assertEqual(seats, {'C00000': 1, 'C00001': 1, 'C00002': 1})
+
+    def test_course_codes_match_regardless_of_case(self):
+        self.assertEqual(bulk_enroll([('student0', 'c00000')]), [ENROLLED])
+
+    def test_command_rejects_short_rows(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as f:
+            f.write('username,course_code\nstudent0,C00000\nstudent1\n')
+            f.flush()
+            with self.assertRaisesMessage(CommandError, 'line 3: expected username and course_code'):
+                call_command('bulk_enroll', f.name, stdout=StringIO())
+        self.assertFalse(Student.courses.through.objects.exists())
+
+    def test_bulk_endpoint_requires_staff(self):
+        client = APIClient()
+        url = reverse('bulk-enrollment')
+        payload = {'enrollments': [{'username': 'student0', 'course_code': 'C00000'}]}
+
+        client.force_authenticate(self.faculty)
+        self.assertEqual(client.post(url, payload, format='json').status_code, 403)
+
+        registrar = User.objects.create(username='registrar', email='registrar@example.com', is_staff=True)
+        client.force_authenticate(registrar)
+        response = client.post(url, payload, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['enrolled'], 1)
+        self.assertEqual(response.data['results'][0]['status'], ENROLLED)
+
+
+class CreateStudentProfileCommandTests(TestCase):
+    def setUp(self):
+        users = User.objects.bulk_create([
+            User(username=f'student{i}', email=f'student{i}@example.com') for i in range(5)
+        ])
+        User.objects.create(username='faculty1', email='faculty1@example.com', role='Faculty')
+        Student.objects.create(user=users[0])
+
+    def test_dry_run_only_counts(self):
+        out = StringIO()
+        call_command('create_student_profile', '--dry-run', stdout=out)
+
+        self.assertIn('4 student profiles would be created', out.getvalue())
+        self.assertEqual(Student.objects.count(), 1)
+
+    def test_creates_missing_profiles_in_batches(self):
+        out = StringIO()
+        with CaptureQueriesContext(connection) as ctx:
+            call_command('create_student_profile', '--batch-size=2', '--progress-every=2', stdout=out)
+
+        self.assertEqual(Student.objects.count(), 5)
+        self.assertFalse(Student.objects.filter(user__role='Faculty').exists())
+        self.assertIn('Successfully created 4 student profiles', out.getvalue())
+        self.assertIn('Created 2 student profiles so far', out.getvalue())
+        # Per batch of two: lookup, user lock, profile count and insert, plus
+        # the savepoint pair around them; then the final empty lookup
+        self.assertEqual(len(ctx), 13)
+
+    def test_profiles_created_since_the_lookup_are_not_counted(self):
+        user_ids = list(
+            User.objects.filter(role='Student', student_profile__isnull=True).values_list('id', flat=True)
+        )
+        # Another backfill got to one of them first
+        Student.objects.create(user_id=user_ids[0])
+
+        self.assertEqual(CreateStudentProfileCommand().create_profiles(user_ids), 3)
+        self.assertEqual(Student.objects.count(), 5)
+
+
+class CourseConstraintTests(TestCase):
+    def test_course_codes_are_unique_ignoring_case(self):
+        faculty = User.objects.create(username='faculty1', email='faculty1@example.com', role='Faculty')
+        Course.objects.create(course_name='Algebra', course_code='MATH101', instructor=faculty)
+
+        with self.assertRaises(IntegrityError):
+            Course.objects.create(course_name='Algebra again', course_code='math101', instructor=faculty)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTests(SimpleTestCase):
+    def route(self, request):
+        seen = {}
+
+        def get_response(request):
+            seen['db'] = ReplicaRouter().db_for_read(Course)
+            return HttpResponse()
+
+        response = ReplicaRoutingMiddleware(get_response)(request)
+        return seen['db'], response
+
+    def test_safe_requests_read_from_replica(self):
+        db, response = self.route(RequestFactory().get('/student-dashboard/'))
+
+        self.assertEqual(db, 'replica1')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        self.assertFalse(replica_reads_allowed.get())
+
+    def test_writes_pin_user_to_primary(self):
+        db, response = self.route(RequestFactory().post('/student-dashboard/'))
+        self.assertEqual(db, 'default')
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 5)
+
+        request = RequestFactory().get('/student-dashboard/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        db, _ = self.route(request)
+        self.assertEqual(db, 'default')
+
+    def test_writes_always_use_primary(self):
+        token = replica_reads_allowed.set(True)
+        try:
+            self.assertEqual(ReplicaRouter().db_for_write(Course), 'default')
+            self.assertFalse(ReplicaRouter().allow_migrate('replica1', 'Task1'))
+        finally:
+            replica_reads_allowed.reset(token)
+
+    async def test_async_requests_stay_async(self):
+        seen = {}
+
+        async def get_response(request):
+            seen['db'] = ReplicaRouter().db_for_read(Course)
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+
+        await middleware(RequestFactory().get('/student-dashboard/'))
+        self.assertEqual(seen['db'], 'replica1')
+        response = await middleware(RequestFactory().post('/student-dashboard/'))
+        self.assertEqual(seen['db'], 'default')
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    def test_token_users_are_pinned_by_id_after_writes(self):
+        cache.clear()
+
+        def api_view(user_id):
+            def get_response(request):
+                # What REST framework does when it authenticates a token
+                authenticated = (User(pk=user_id), 'token')
+                with mock.patch.object(TokenAuthentication, 'authenticate', return_value=authenticated):
+                    request.user, request.auth = PinnedTokenAuthentication().authenticate(request)
+                seen['db'] = ReplicaRouter().db_for_read(Course)
+                return HttpResponse()
+            return ReplicaRoutingMiddleware(get_response)
+
+        seen = {}
+        api_view(42)(RequestFactory().post('/api/courses/'))
+        api_view(42)(RequestFactory().get('/api/courses/'))
+        self.assertEqual(seen['db'], 'default')
+        api_view(43)(RequestFactory().get('/api/courses/'))
+        self.assertEqual(seen['db'], 'replica1')
+
+    def test_catalog_cache_misses_are_built_from_primary(self):
+        cache.clear()
+        token = replica_reads_allowed.set(True)
+        try:
+            db = cached_catalog('test', {}, lambda: ReplicaRouter().db_for_read(Course))
+            self.assertEqual(db, 'default')
+            self.assertTrue(replica_reads_allowed.get())
+        finally:
+            replica_reads_allowed.reset(token)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_reads_primary(self):
+        db, response = self.route(RequestFactory().get('/student-dashboard/'))
+
+        self.assertEqual(db, 'default')
+
+
+class TemplateWarmupTests(TestCase):
+    def test_warmup_fills_cached_loader(self):
+        loader = engines['django'].engine.template_loaders[0]
+        loader.reset()
+
+        self.assertEqual(warm_templates(), WARMUP_TEMPLATES)
+
+        self.assertEqual(set(loader.get_template_cache), set(WARMUP_TEMPLATES))
+
+
+class ConcurrentEnrollmentTests(TransactionTestCase):
+    @skipUnlessDBFeature('has_select_for_update')
+    def test_concurrent_enrollments_respect_cap(self):
+        faculty = create_user('faculty1', role='Faculty')
+        student = create_student('student1')
+        courses = create_courses(faculty, 6)
+        barrier = threading.Barrier(len(courses))
+
+        def attempt(course):
+            try:
+                barrier.wait()
+                enroll_student(student, course.id)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=attempt, args=(course,)) for course in courses]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(student.courses.count(), MAX_COURSES_PER_STUDENT)
+
+    @skipUnlessDBFeature('has_select_for_update')
+    def test_concurrent_enrollments_do_not_oversubscribe_course(self):
+        faculty = create_user('faculty1', role='Faculty')
+        course = Course.objects.create(course_name='Hot', course_code='HOT100', capacity=3, instructor=faculty)
+        students = [create_student(f'student{i}') for i in range(10)]
+        barrier = threading.Barrier(len(students))
+
+        def attempt(student):
+            try:
+                barrier.wait()
+                enroll_student(student, course.id)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=attempt, args=(student,)) for student in students]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        course.refresh_from_db()
+        self.assertEqual(course.students.count(), 3)
+        self.assertEqual(course.seats_taken, 3)
+
+
+class CourseCapacityTests(TestCase):
+    def setUp(self):
+        self.faculty = create_user('faculty1', role='Faculty')
+        self.course = Course.objects.create(
+            course_name='Seminar', course_code='SEM100', capacity=1, instructor=self.faculty
+        )
+        self.students = [create_student(f'student{i}') for i in range(2)]
+
+    def test_full_course_rejects_enrollment(self):
+        self.assertEqual(enroll_student(self.students[0], self.course.id).status, ENROLLED)
+
+        result = enroll_student(self.students[1], self.course.id)
+
+        self.assertEqual(result.status, COURSE_FULL)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.seats_taken, 1)
+        self.assertEqual(self.course.students.count(), 1)
+
+    def test_drop_frees_seat(self):
+        enroll_student(self.students[0], self.course.id)
+
+        self.assertEqual(drop_student(self.students[0], self.course.id).status, DROPPED)
+        self.assertEqual(drop_student(self.students[0], self.course.id).status, NOT_ENROLLED)
+
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.seats_taken, 0)
+        self.assertEqual(enroll_student(self.students[1], self.course.id).status, ENROLLED)
+
+    def test_faculty_update_keeps_seat_counter(self):
+        enroll_student(self.students[0], self.course.id)
+        self.client.force_login(self.faculty)
+
+        self.client.post(reverse('faculty-dashboard'), {
+            'action': 'update', 'course_id': self.course.id, 'name': 'Seminar II',
+            'code': 'SEM100', 'credits': 3, 'capacity': 5,
+        })
+
+        self.course.refresh_from_db()
+        self.assertEqual((self.course.course_name, self.course.capacity), ('Seminar II', 5))
+        self.assertEqual(self.course.seats_taken, 1)
@@ -1,9 +1,14 @@
-from django.urls import path
+from django.urls import include, path
+from rest_framework.authtoken.views import obtain_auth_token
+from rest_framework.routers import DefaultRouter
 from .views import (
     LoginView, RegisterView, StudentDashboardView, 
-    FacultyDashboardView, IndexView, LogoutView
+    FacultyDashboardView, IndexView, LogoutView, MetricsView, CourseViewSet, BulkEnrollmentView
 )
 
+router = DefaultRouter()
+router.register('courses', CourseViewSet, basename='course')
+
 urlpatterns = [
     path('', IndexView.as_view(), name='index'),
     path('login/', LoginView.as_view(), name='login'),
@@ -11,4 +16,8 @@ urlpatterns = [
     path('student-dashboard/', StudentDashboardView.as_view(), name='student-dashboard'),
     path('faculty-dashboard/', FacultyDashboardView.as_view(), name='faculty-dashboard'),
     path('logout/', LogoutView.as_view(), name='logout'),
+    path('metrics', MetricsView.as_view(), name='metrics'),
+    path('api/token/', obtain_auth_token, name='api-token'),
+    path('api/enrollments/bulk/', BulkEnrollmentView.as_view(), name='bulk-enrollment'),
+    path('api/', include(router.urls)),
 ]
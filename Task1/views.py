@@ -1,9 +1,34 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
 from django.shortcuts import render, redirect
 from django.contrib.auth import login, authenticate, logout
+from django.contrib.auth.hashers import make_password
 from django.contrib import messages
+from django.utils.crypto import constant_time_compare
+from django.utils.decorators import method_decorator
 from django.views import View
+from django.views.decorators.cache import cache_page
 from django.contrib.auth.mixins import LoginRequiredMixin
-from .models import User, Course, Student
+from django.db.models import Count, F, OuterRef, Prefetch, Subquery
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .caching import cached_catalog
+from .metrics import exposition
+from .models import Course, Student, WaitlistEntry
+from .pagination import CourseCursorPagination, RosterCursorPagination
+from .permissions import IsCourseInstructorOrStaff, IsFaculty
+from .serializers import (
+    BulkEnrollmentSerializer, CourseSerializer, CourseListSerializer, StudentInfoSerializer, requested_fields
+)
+from .services import (
+    ENROLLED, ALREADY_ENROLLED, LIMIT_REACHED, COURSE_FULL, DROPPED, NOT_ENROLLED,
+    WAITLISTED, ALREADY_WAITLISTED, COURSE_HAS_SEATS, LEFT_WAITLIST, NOT_WAITLISTED,
+    MAX_COURSES_PER_STUDENT, enroll_student, drop_student, join_waitlist, leave_waitlist, bulk_enroll,
+    register_user
+)
 
 class LoginView(View):
     def get(self, request):
@@ -67,37 +92,52 @@ class RegisterView(View):
         if not all([username, email, password, role]):
             return render(request, 'register.html', {'error_message': 'Please fill in all required fields'})
 
-        if User.objects.filter(username=username).exists():
-            return render(request, 'register.html', {'error_message': 'Username already exists'})
-
-        if User.objects.filter(email=email).exists():
-            return render(request, 'register.html', {'error_message': 'Email already exists'})
-
         try:
-            # Create the user with the appropriate role
-            user = User.objects.create_user(
-                username=username,
-                email=email,
-                password=password,
-                role='Student' if role.lower() == 'student' else 'Faculty'
-            )
-
-            # Handle student role
-            if role.lower() == 'student':
-                # Create student profile
-                student = Student.objects.create(user=user)
-            
-            # Add success message
-            messages.success(request, 'Registration successful! Please login with your credentials.')
-            # Redirect to login page instead of dashboard
-            return redirect('login')
-
+            error_message = register_user(username, email, role, make_password(password))
         except Exception as e:
             print(f"Error during registration: {str(e)}")  # Debug print
             return render(request, 'register.html', {'error_message': str(e)})
+        if error_message:
+            return render(request, 'register.html', {'error_message': error_message})
+
+        # Add success message
+        messages.success(request, 'Registration successful! Please login with your credentials.')
+        # Redirect to login page instead of dashboard
+        return redirect('login')
+
+def filter_available_courses(queryset, params):
+    """Apply the dashboard's code/name/instructor/credits filters from ``params``.
+
+    Returns the filtered queryset and the cleaned filter values for the template.
+    """
+    filters = {
+        'code': params.get('code', '').strip(),
+        'name': params.get('name', '').strip(),
+        'instructor': params.get('instructor', '').strip(),
+        'credits': params.get('credits', '').strip(),
+    }
+    if filters['code']:
+        queryset = queryset.filter(course_code__istartswith=filters['code'])
+    if filters['name']:
+        queryset = queryset.filter(course_name__icontains=filters['name'])
+    if filters['instructor']:
+        queryset = queryset.filter(instructor__username__icontains=filters['instructor'])
+    if filters['credits'].isdigit():
+        queryset = queryset.filter(credits=int(filters['credits']))
+    else:
+        # Ignore anything that isn't a whole number of credits
+        filters['credits'] = ''
+    return queryset, filters
+
+# Course fields shown on a dashboard card
+CATALOG_CARD_FIELDS = [
+    'id', 'course_name', 'course_code', 'credits', 'capacity', 'seats_taken', 'updated_at',
+    'instructor__username',
+]
 
 class StudentDashboardView(LoginRequiredMixin, View):
     login_url = '/login/'
+    page_size = 20
 
     def get(self, request):
         # Check ONLY the role for Student access
@@ -109,14 +149,66 @@ class StudentDashboardView(LoginRequiredMixin, View):
         if not hasattr(request.user, 'student_profile'):
             Student.objects.create(user=request.user)
         
-        enrolled_courses = request.user.student_profile.courses.all()
-        available_courses = Course.objects.exclude(id__in=[course.id for course in enrolled_courses])
-        
-        return render(request, 'student-dashboard.html', {
+        student = request.user.student_profile
+        enrolled_courses = list(self.enrolled_courses(student))
+        waitlist = list(self.waitlist(student))
+        catalog, filters, cache_params = self.catalog_page(request.GET, len(enrolled_courses))
+        catalog_page = cached_catalog('available', cache_params, lambda: list(catalog))
+        return render(request, 'student-dashboard.html', self.get_dashboard_context(
+            request, enrolled_courses, waitlist, catalog_page, filters
+        ))
+
+    def enrolled_courses(self, student):
+        # Fetch enrolled courses once, with their instructors joined in
+        return student.courses.select_related('instructor')
+
+    def waitlist(self, student):
+        # Waitlist places, numbered by counting entries ahead in the same course
+        entries_ahead = WaitlistEntry.objects.filter(
+            course_id=OuterRef('course_id'), id__lte=OuterRef('id')
+        ).values('course_id').annotate(n=Count('id')).values('n')
+        return student.waitlist_entries.select_related('course__instructor').annotate(
+            position=Subquery(entries_ahead)
+        )
+
+    def catalog_page(self, params, enrolled_count):
+        """Return the catalog page query, the cleaned filters and the page's cache parameters."""
+        catalog, filters = filter_available_courses(Course.objects.all(), params)
+
+        # Keyset pagination: only courses after the last id of the previous page
+        after = params.get('after', '')
+        if after.isdigit():
+            catalog = catalog.filter(id__gt=int(after))
+
+        # The catalog page is shared by all students, so it is cached without the
+        # per-student exclusion. Over-fetching by the number of enrolled courses
+        # (at most the course cap) still leaves a full page once they are removed.
+        limit = self.page_size + max(MAX_COURSES_PER_STUDENT, enrolled_count) + 1
+        catalog = catalog.select_related('instructor').only(*CATALOG_CARD_FIELDS).order_by('id')[:limit]
+        return catalog, filters, {**filters, 'after': after, 'limit': limit}
+
+    def get_dashboard_context(self, request, enrolled_courses, waitlist, catalog_page, filters):
+        enrolled_ids = {course.id for course in enrolled_courses}
+        page = [course for course in catalog_page if course.id not in enrolled_ids]
+        has_next = len(page) > self.page_size
+        page = page[:self.page_size]
+
+        next_query = None
+        if has_next:
+            params = request.GET.copy()
+            params['after'] = page[-1].id
+            next_query = params.urlencode()
+
+        return {
             'enrolled_courses': enrolled_courses,
-            'available_courses': available_courses,
-            'can_enroll': enrolled_courses.count() < 2  # Add this to check if student can enroll in more courses
-        })
+            'available_courses': page,
+            'waitlist': waitlist,
+            'waitlisted_ids': {entry.course_id for entry in waitlist},
+            'filters': filters,
+            'is_first_page': not request.GET.get('after', '').isdigit(),
+            'next_query': next_query,
+            'can_enroll': len(enrolled_courses) < MAX_COURSES_PER_STUDENT  # Add this to check if student can enroll in more courses
+        }
 
     def post(self, request):
         # Check ONLY the role for Student access
@@ -131,23 +223,48 @@ class StudentDashboardView(LoginRequiredMixin, View):
         action = request.POST.get('action')
         course_id = request.POST.get('course_id')
 
-        try:
-            course = Course.objects.get(id=course_id)
-            if action == 'enroll':
-                # Check if student has already enrolled in 2 courses
-                enrolled_count = request.user.student_profile.courses.count()
-                if enrolled_count >= 2:
-                    messages.error(request, 'You cannot enroll in more than 2 courses.')
-                else:
-                    request.user.student_profile.courses.add(course)
-                    messages.success(request, f'Successfully enrolled in {course.course_name}')
-            elif action == 'drop':
-                request.user.student_profile.courses.remove(course)
-                messages.success(request, f'Successfully dropped {course.course_name}')
-        except Course.DoesNotExist:
-            messages.error(request, 'Course not found')
-        except Exception as e:
-            messages.error(request, str(e))
+        if action == 'enroll':
+            # Cap check, seat reservation and insert happen atomically inside the service
+            result = enroll_student(request.user.student_profile, course_id)
+            if result.status == ENROLLED:
+                messages.success(request, f'Successfully enrolled in {result.course.course_name}')
+            elif result.status == ALREADY_ENROLLED:
+                messages.error(request, f'You are already enrolled in {result.course.course_name}')
+            elif result.status == LIMIT_REACHED:
+                messages.error(request, f'You cannot enroll in more than {MAX_COURSES_PER_STUDENT} courses.')
+            elif result.status == COURSE_FULL:
+                messages.error(request, f'{result.course.course_name} is full')
+            else:
+                messages.error(request, 'Course not found')
+        elif action == 'drop':
+            # The freed seat is handed to the next waitlisted student in the same transaction
+            result = drop_student(request.user.student_profile, course_id)
+            if result.status == DROPPED:
+                messages.success(request, f'Successfully dropped {result.course.course_name}')
+            elif result.status == NOT_ENROLLED:
+                messages.error(request, f'You are not enrolled in {result.course.course_name}')
+            else:
+                messages.error(request, 'Course not found')
+        elif action == 'waitlist':
+            result = join_waitlist(request.user.student_profile, course_id)
+            if result.status == WAITLISTED:
+                messages.success(request, f'Joined the waitlist for {result.course.course_name}')
+            elif result.status == ALREADY_WAITLISTED:
+                messages.error(request, f'You are already on the waitlist for {result.course.course_name}')
+            elif result.status == ALREADY_ENROLLED:
+                messages.error(request, f'You are already enrolled in {result.course.course_name}')
+            elif result.status == COURSE_HAS_SEATS:
+                messages.error(request, f'{result.course.course_name} still has seats, enroll instead')
+            else:
+                messages.error(request, 'Course not found')
+        elif action == 'leave-waitlist':
+            result = leave_waitlist(request.user.student_profile, course_id)
+            if result.status == LEFT_WAITLIST:
+                messages.success(request, f'Left the waitlist for {result.course.course_name}')
+            elif result.status == NOT_WAITLISTED:
+                messages.error(request, f'You are not on the waitlist for {result.course.course_name}')
+            else:
+                messages.error(request, 'Course not found')
 
         return redirect('student-dashboard')
 
@@ -160,9 +277,18 @@ class FacultyDashboardView(LoginRequiredMixin, View):
             messages.error(request, 'Access denied. Faculty account required.')
             return redirect('login')
         
-        courses = Course.objects.filter(instructor=request.user)
+        courses = cached_catalog(
+            'faculty', {'instructor': request.user.id}, lambda: list(self.courses(request.user))
+        )
         return render(request, 'faculty-dashboard.html', {'courses': courses})
 
+    def courses(self, instructor):
+        # Count enrollments in the same query instead of one COUNT per course card
+        return Course.objects.filter(instructor=instructor).annotate(
+            enrolled_count=Count('students'),
+            seats_remaining=F('capacity') - Count('students'),
+        ).order_by('id')
+
     def post(self, request):
         # Check ONLY the role for Faculty access
         if request.user.role != 'Faculty':
@@ -176,12 +302,15 @@ class FacultyDashboardView(LoginRequiredMixin, View):
             name = request.POST.get('name')
             code = request.POST.get('code')
             credits = request.POST.get('credits')
+            # Blank capacity means unlimited seats
+            capacity = request.POST.get('capacity') or None
 
             try:
                 Course.objects.create(
                     course_name=name,
                     course_code=code,
                     credits=credits,
+                    capacity=capacity,
                     instructor=request.user
                 )
                 messages.success(request, f'Successfully created course {name}')
@@ -202,7 +331,10 @@ class FacultyDashboardView(LoginRequiredMixin, View):
                 course.course_name = request.POST.get('name', course.course_name)
                 course.course_code = request.POST.get('code', course.course_code)
                 course.credits = request.POST.get('credits', course.credits)
-                course.save()
+                if 'capacity' in request.POST:
+                    course.capacity = request.POST.get('capacity') or None
+                # Leave seats_taken alone; it is only changed by the enrollment service
+                course.save(update_fields=['course_name', 'course_code', 'credits', 'capacity', 'updated_at'])
                 messages.success(request, 'Course updated successfully')
             except Course.DoesNotExist:
                 messages.error(request, 'Course not found')
@@ -225,6 +357,90 @@ class LogoutView(View):
         
         return response
 
+@method_decorator(cache_page(60 * 15), name='dispatch')
 class IndexView(View):
     def get(self, request):
         return render(request, 'index.html')
+
+
+class MetricsView(View):
+    def get(self, request):
+        # Scrapers send the token as a bearer token when one is configured
+        if settings.METRICS_TOKEN and not constant_time_compare(
+            request.headers.get('Authorization', ''), f'Bearer {settings.METRICS_TOKEN}'
+        ):
+            return HttpResponseForbidden()
+        return HttpResponse(exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class CourseViewSet(viewsets.ModelViewSet):
+    pagination_class = CourseCursorPagination
+
+    def get_permissions(self):
+        # Anyone signed in can browse the catalog; only faculty can change it,
+        # and only a course's instructor or staff can read its roster
+        if self.action in ('list', 'retrieve'):
+            return [IsAuthenticated()]
+        if self.action == 'students':
+            return [IsAuthenticated(), IsCourseInstructorOrStaff()]
+        return [IsFaculty()]
+
+    def get_serializer_class(self):
+        # Listings stay slim; the nested roster is only built for a single course
+        if self.action == 'list':
+            return CourseListSerializer
+        return CourseSerializer
+
+    def get_queryset(self):
+        queryset = Course.objects.select_related('instructor')
+        fields = requested_fields(self.request)
+        # Roster rows are only loaded when the response can include them; only
+        # instructors and staff are shown rosters (see CourseSerializer)
+        user = self.request.user
+        if (self.action == 'retrieve' and (not fields or 'enrolled_students' in fields)
+                and (user.is_staff or user.role == 'Faculty')):
+            queryset = queryset.prefetch_related(
+                Prefetch('students', queryset=Student.objects.select_related('user'))
+            )
+        if self.action not in ('list', 'retrieve', 'students'):
+            queryset = queryset.filter(instructor=self.request.user)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        # Listings are keyed on the full URL (cursor, page size, fields) and the
+        # host, since the pagination links are absolute
+        data = cached_catalog(
+            'api-courses', {'path': request.get_full_path(), 'host': request.get_host()},
+            lambda: super(CourseViewSet, self).list(request, *args, **kwargs).data
+        )
+        return Response(data)
+
+    def perform_create(self, serializer):
+        serializer.save(instructor=self.request.user)
+
+    @action(detail=True)
+    def students(self, request, pk=None):
+        course = self.get_object()
+        paginator = RosterCursorPagination()
+        page = paginator.paginate_queryset(course.students.select_related('user'), request, view=self)
+        return paginator.get_paginated_response(StudentInfoSerializer(page, many=True).data)
+
+
+class BulkEnrollmentView(APIView):
+    # Registrar batch jobs run as staff accounts
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        serializer = BulkEnrollmentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        pairs = [(row['username'], row['course_code']) for row in serializer.validated_data['enrollments']]
+
+        statuses = bulk_enroll(pairs)
+
+        return Response({
+            'enrolled': statuses.count(ENROLLED),
+            'results': [
+                {'username': username, 'course_code': code, 'status': status}
+                for (username, code), status in zip(pairs, statuses)
+            ],
+        })
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.template.loader import get_template
+
+WARMUP_TEMPLATES = [
+    'login.html',
+    'register.html',
+    'index.html',
+    'student-dashboard.html',
+    'faculty-dashboard.html',
+]
+
+
+def warm_templates():
+    """Load and compile the main templates into the cached template loader.
+
+    Called from the WSGI/ASGI entry points so the parse cost is paid at
+    worker boot, or once in the master when the server preloads the app.
+    """
+    if not settings.TEMPLATE_WARMUP:
+        return []
+    for name in WARMUP_TEMPLATES:
+        get_template(name)
+    return WARMUP_TEMPLATES